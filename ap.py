@@ -3,12 +3,28 @@ import requests
 import json
 from datetime import datetime, timedelta
 import base64
-from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
-import textwrap
-import zipfile
 import os
-import google.generativeai as genai
+import time
+from functools import partial
+
+from artifact_store import get_store
+from card_browser import card_browser
+from exports import EXPORT_FORMATS, export_file_name, get_export
+from flash_cards import (
+    CARD_SIZES,
+    DEFAULT_NEWS,
+    DOWNLOAD_SCALE,
+    card_key,
+    create_linkedin_post,
+    generate_marketing_news,
+    parse_ai_response,
+)
+from digest import PERIODS, build_digest, digest_label, gemini_summarizer, local_summary
+from pack_history import available_dates, load_daily_pack, save_daily_pack
+from news_selection import CANDIDATE_COUNT, MARKETING_RULES, PACK_SIZE, select_news
+from profiling import profile_rerun
+from render_engine import CardJob, get_engine, job_to_dict, render_job, timing_report
+from session_artifacts import remember_artifact, show_memory_report, store_session_json
 
 # Configure page
 st.set_page_config(
@@ -60,192 +76,270 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def create_flash_card_image(title, content, index, total=5):
-    """Create a flash card image with sketch font styling"""
-    # Card dimensions
-    width, height = 800, 600
-    
-    # Create image with gradient background
-    img = Image.new('RGB', (width, height), color='white')
-    draw = ImageDraw.Draw(img)
-    
-    # Create gradient background
-    for y in range(height):
-        r = int(102 + (118 - 102) * y / height)
-        g = int(126 + (75 - 126) * y / height)
-        b = int(234 + (162 - 234) * y / height)
-        draw.line([(0, y), (width, y)], fill=(r, g, b))
-    
-    # Try to load custom fonts (fallback to default if not available)
-    try:
-        title_font = ImageFont.truetype("arial.ttf", 32)
-        content_font = ImageFont.truetype("arial.ttf", 20)
-        number_font = ImageFont.truetype("arial.ttf", 48)
-    except:
-        title_font = ImageFont.load_default()
-        content_font = ImageFont.load_default()
-        number_font = ImageFont.load_default()
-    
-    # Draw card number
-    draw.text((50, 50), f"{index}", fill='white', font=number_font)
-    
-    # Draw title with text wrapping
-    title_wrapped = textwrap.fill(title, width=35)
-    draw.text((50, 120), title_wrapped, fill='white', font=title_font)
-    
-    # Draw content with text wrapping
-    content_wrapped = textwrap.fill(content, width=50)
-    draw.text((50, 250), content_wrapped, fill='white', font=content_font)
-    
-    # Add decorative elements
-    draw.rectangle([30, height-80, width-30, height-30], outline='white', width=3)
-    draw.text((50, height-65), f"India Marketing News • {datetime.now().strftime('%B %d, %Y')}", 
-             fill='white', font=content_font)
-    
-    return img
-
-def generate_marketing_news_with_ai(api_key):
+def generate_marketing_news_with_ai(api_key, count=PACK_SIZE):
     """Generate marketing news using Google AI Studio API"""
-    genai.configure(api_key=api_key)
-    
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
-        prompt = f"""
-        Create exactly 5 marketing news items for India on {datetime.now().strftime('%B %d, %Y')}. 
-        
-        For each item, provide:
-        - A compelling headline (max 50 characters)
-        - A brief description (max 100 characters)
-        
-        Focus on current trends in:
-        - Digital marketing in India
-        - Brand campaigns and consumer insights
-        - Social media and e-commerce marketing
-        - Marketing technology and AI adoption
-        - Regional marketing strategies
-        
-        Format your response exactly like this example:
+        return generate_marketing_news(api_key, count)
+    except Exception as e:
+        st.error(f"Error generating content with AI: {str(e)}")
+        return None
 
-        1. TITLE: AI Marketing Tools Boost ROI by 35%
-        CONTENT: Indian startups adopting AI-driven marketing see higher conversions and reduced costs.
+def card_jobs(news_items, variants=("landscape",), start=0, stop=None, date=None):
+    """``(key, CardJob)`` for cards ``start:stop`` in (card, variant) order"""
+    total = len(news_items)
+    stop = total if stop is None else stop
+    jobs = []
+    for i in range(start + 1, stop + 1):
+        item = news_items[i - 1]
+        for variant in variants:
+            key = card_key(item, i, total, date, scale=DOWNLOAD_SCALE, variant=variant)
+            jobs.append((key, CardJob(item['title'], item['content'], i, total, date, variant=variant)))
+    return jobs
 
-        2. TITLE: Regional Content Drives 50% More Engagement  
-        CONTENT: Brands using local languages in campaigns outperform English-only content significantly.
+def ensure_cards(news_items, variants=("landscape",), start=0, stop=None, date=None):
+    """Render cards ``start:stop`` not yet in the artifact store, as one batch.
 
-        3. TITLE: Social Commerce Hits ₹4 Lakh Crore Mark
-        CONTENT: Instagram Shopping and WhatsApp Business drive massive growth in social selling.
+    Returns the full-size PNG keys in (card, variant) order, the
+    thumbnails rendered by this call keyed by card key, and a timing
+    report, or None when everything was already cached. Thumbnails are
+    stored under ``key + ":thumb"``, from the same render. Doesn't touch
+    session state, so it is safe to call from the prefetch thread.
+    """
+    store = get_store()
+    jobs = card_jobs(news_items, variants, start, stop, date)
+    keys = [key for key, _ in jobs]
+    missing = [(key, job) for key, job in jobs
+               if key not in store or f"{key}:thumb" not in store]
+    
+    if not missing:
+        return keys, {}, None
+    
+    engine = get_engine()
+    t0 = time.perf_counter()
+    results = engine.render(job for _, job in missing)
+    thumbnails = {}
+    for (key, _), result in zip(missing, results):
+        store.put(key, result.data)
+        store.put(f"{key}:thumb", result.thumbnail)
+        thumbnails[key] = result.thumbnail
+    report = timing_report(results, time.perf_counter() - t0, engine.is_parallel(len(missing)))
+    return keys, thumbnails, report
 
-        4. TITLE: Video Marketing Budgets Double This Year
-        CONTENT: Short-form video content becomes top priority for 80% of Indian marketers.
+def get_thumbnails(news_items, start=0, stop=None, date=None):
+    """Grid previews for the landscape cards, rendering any that are missing.
 
-        5. TITLE: Voice Search Changes Local Marketing Game
-        CONTENT: 60% of consumers use voice search for local business discovery and reviews.
+    Returns the thumbnails and the render timing report (None if all cached).
+    """
+    keys, thumbnails, report = ensure_cards(news_items, start=start, stop=stop, date=date)
+    store = get_store()
+    previews = []
+    for index, key in enumerate(keys, start + 1):
+        remember_artifact(key)
+        remember_artifact(f"{key}:thumb")
+        thumbnail = thumbnails.get(key) or store.get(f"{key}:thumb")
+        if thumbnail is None:
+            # Evicted under memory pressure; render it again without caching
+            item = news_items[index - 1]
+            thumbnail = render_job(CardJob(item['title'], item['content'], index, len(news_items), date)).thumbnail
+        previews.append(thumbnail)
+    return previews, report
 
-        Please follow this exact format with TITLE: and CONTENT: labels.
-        """
-        
-        response = model.generate_content(prompt)
-        return response.text
-        
-    except Exception as e:
-        st.error(f"Error generating content with AI: {str(e)}")
-        return None
+def load_card_png(item, index, total, date=None):
+    """Full-size PNG, fetched only when a download is clicked.
 
-def parse_ai_response(response_text):
-    """Parse AI response into structured news items with improved error handling"""
-    news_items = []
-    
-    # Try multiple parsing strategies
-    if not response_text:
-        return []
-    
-    # Strategy 1: Look for numbered items with TITLE/CONTENT format
-    lines = response_text.strip().split('\n')
-    current_item = {}
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        if line.startswith('TITLE:') or 'TITLE:' in line:
-            if current_item and 'title' in current_item and 'content' in current_item:
-                news_items.append(current_item)
-            title = line.split('TITLE:')[-1].strip()
-            current_item = {'title': title}
-        elif line.startswith('CONTENT:') or 'CONTENT:' in line:
-            if current_item:
-                content = line.split('CONTENT:')[-1].strip()
-                current_item['content'] = content
-    
-    # Add the last item
-    if current_item and 'title' in current_item and 'content' in current_item:
-        news_items.append(current_item)
-    
-    # Strategy 2: If first strategy didn't work, try simpler parsing
-    if len(news_items) < 3:
-        news_items = []
-        # Split by numbered items
-        sections = response_text.split('\n\n')
-        for section in sections:
-            if len(news_items) >= 5:
-                break
-            lines = section.strip().split('\n')
-            if len(lines) >= 2:
-                title = lines[0].strip()
-                # Clean up title (remove numbers, bullets, etc.)
-                title = title.lstrip('0123456789. -•').strip()
-                if title.startswith('TITLE:'):
-                    title = title.replace('TITLE:', '').strip()
-                
-                content = ' '.join(lines[1:]).strip()
-                if content.startswith('CONTENT:'):
-                    content = content.replace('CONTENT:', '').strip()
-                
-                if title and content and len(title) > 10:
-                    news_items.append({'title': title, 'content': content})
-    
-    return news_items[:5]  # Ensure we only get 5 items
+    Runs off the script thread, so it must not touch session state.
+    """
+    key = card_key(item, index, total, date, scale=DOWNLOAD_SCALE)
+    png = get_store().get(key)
+    if png is None:
+        # Evicted under memory pressure; render it again without caching
+        png = render_job(CardJob(item['title'], item['content'], index, total, date)).data
+    return png
 
-def create_linkedin_post(news_items):
-    """Generate LinkedIn post content"""
-    today = datetime.now().strftime('%B %d, %Y')
-    
-    post_content = f"""🚀 Daily Marketing Flash ⚡ | {today}
+def show_render_report(report):
+    """Caption (and per-card table) for a batch that actually rendered something"""
+    if report is None:
+        return
+    mode = f"{get_engine().max_workers} worker processes" if report['parallel'] else "in-process"
+    st.caption(f"⏱️ Rendered {report['cards']} cards in {report['elapsed']:.2f}s ({mode})")
+    with st.expander("⏱️ Per-card render timing"):
+        st.dataframe(report['per_card'])
 
-Top 5 Marketing Insights for India Today:
+def load_news_items(default_news):
+    """News items generated in this session, or the defaults"""
+    return st.session_state.get('news_items', default_news)
 
-"""
-    
-    for i, item in enumerate(news_items, 1):
-        post_content += f"{i}. {item['title']}\n   {item['content']}\n\n"
-    
-    post_content += """💡 Which trend excites you the most?
+def save_news_items(news_items):
+    st.session_state['news_items'] = news_items
+    # Kept on disk for weekly/monthly digests
+    save_daily_pack("marketing", news_items, create_linkedin_post(news_items))
+
+def export_download_button(fmt, pack, label, file_name):
+    """Download button whose payload is only built when it is clicked"""
+    st.download_button(
+        label=label,
+        data=partial(get_export, fmt, pack),
+        file_name=file_name,
+        mime=EXPORT_FORMATS[fmt].mime,
+        key=f"export_{fmt}",
+        on_click="ignore"
+    )
 
-#MarketingIndia #DigitalMarketing #MarketingTrends #IndiaMarketing #MarketingInsights #MarketingStrategy #BrandMarketing
+# Fragments rerun on their own; new news items go through a full app rerun
 
----
-Generated with AI • Follow for daily marketing insights"""
-    
-    return post_content
+def show_selection_report(selection):
+    """How many over-generated candidates survived validation, and why the rest didn't"""
+    st.caption(f"🎯 Picked {len(selection.news)} of {selection.candidate_count} candidates "
+               f"({len(selection.rejected)} rejected)")
+    if selection.rejected:
+        with st.expander("🔍 Debug: Rejected candidates"):
+            for item, reason in selection.rejected:
+                st.text(f"{reason}: {item.get('title', '')}")
+
+@st.fragment
+def sidebar_config():
+    """API key entry; generating fresh content reruns the whole app"""
+    st.header("🔑 Configuration")
+    api_key = st.text_input("Google AI Studio API Key", type="password", 
+                           help="Enter your Google AI Studio API key to generate fresh content")
+    st.checkbox("🎯 Over-generate and pick the best", value=True, key='overgenerate',
+                help=f"Ask for {CANDIDATE_COUNT} candidates in one call and keep the best {PACK_SIZE}, "
+                     "so a short or messy response doesn't need another call")
+    
+    if st.button("🔄 Generate Fresh Content", type="primary"):
+        if api_key:
+            st.session_state['generate_fresh'] = True
+            st.session_state['api_key'] = api_key
+            st.rerun(scope="app")
+        else:
+            st.error("Please enter your API key first!")
+
+@st.fragment
+def card_grid(news_items):
+    st.subheader("📋 Today's Marketing Flash Cards")
+    card_browser(news_items, show_card_page, warm=warm_card_page)
+
+def show_card_page(news_items, start, stop, date=None, key="download"):
+    """One page of the card grid"""
+    cols = st.columns(2)
+    # Rendered cards are shared across sessions through the artifact store;
+    # the grid only ships the small thumbnails to the browser
+    thumbnails, report = get_thumbnails(news_items, start, stop, date)
+    
+    for offset, thumbnail in enumerate(thumbnails):
+        i = start + offset
+        with cols[offset % 2]:
+            st.image(thumbnail, width="stretch")
+            
+            # Download button for individual card; the full-size PNG is only
+            # read when clicked, and downloading needs no rerun
+            st.download_button(
+                label=f"📥 Download Card {i+1}",
+                data=partial(load_card_png, news_items[i], i+1, len(news_items), date),
+                file_name=f"marketing_flash_card_{i+1}.png",
+                mime="image/png",
+                key=f"{key}_{i}",
+                on_click="ignore"
+            )
+    show_render_report(report)
 
-def create_download_zip(images, linkedin_content):
-    """Create a ZIP file with all images and LinkedIn content"""
-    zip_buffer = BytesIO()
+def warm_card_page(news_items, start, stop, date=None):
+    """Prefetch callback: render a page into the artifact store"""
+    ensure_cards(news_items, start=start, stop=stop, date=date)
+
+@st.fragment
+def linkedin_panel(linkedin_content):
+    st.subheader("📱 Ready-to-Post LinkedIn Content")
+    
+    st.markdown(f'<div class="linkedin-post">{linkedin_content}</div>', unsafe_allow_html=True)
     
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Add images
-        for i, img in enumerate(images, 1):
-            img_buffer = BytesIO()
-            img.save(img_buffer, format='PNG')
-            zip_file.writestr(f'flash_card_{i}.png', img_buffer.getvalue())
-        
-        # Add LinkedIn content
-        zip_file.writestr('linkedin_post.txt', linkedin_content)
+    # Copy button for LinkedIn content
+    st.text_area("Copy this content:", linkedin_content, height=200)
+
+@st.fragment
+def export_panel(news_items, linkedin_content):
+    st.subheader("📦 Download Everything")
+    variants = st.multiselect(
+        "Card sizes", list(CARD_SIZES), default=["landscape"], format_func=str.title,
+        help="Landscape 800x600, square 1080x1080 and portrait 1080x1350"
+    ) or ["landscape"]
+    
+    # Nothing is rendered here: the ZIP build renders whatever isn't cached yet,
+    # in one batch, only when the download is clicked
+    jobs = card_jobs(news_items, variants)
+    card_names = [
+        f"flash_card_{i}.png" if len(variants) == 1 else f"flash_card_{i}_{variant}.png"
+        for i in range(1, len(news_items) + 1) for variant in variants
+    ]
     
-    zip_buffer.seek(0)
-    return zip_buffer
+    pack = {
+        "title": "India Marketing News",
+        "heading": "MARKETING INSIGHTS",
+        "date": datetime.now().strftime('%Y-%m-%d'),
+        "news": news_items,
+        "linkedin_post": linkedin_content,
+        "card_keys": [key for key, _ in jobs],
+        "card_names": card_names,
+        "card_jobs": [job_to_dict(job) for _, job in jobs]
+    }
+    
+    # The ZIP is only compressed when asked for, then memoized per pack version
+    export_download_button(
+        "zip", pack,
+        label="📦 Download All Cards + LinkedIn Post (ZIP)",
+        file_name=export_file_name("zip", pack, "marketing_flash_cards")
+    )
+
+@st.fragment
+def digest_panel():
+    """Weekly/monthly roundup built from the cached daily summaries"""
+    st.subheader("📆 Weekly & Monthly Roundups")
+    period = st.radio("Roundup period", PERIODS, format_func=str.title, horizontal=True)
+    
+    if st.button("🗞️ Build Roundup", help="Only days without a cached summary are processed"):
+        # Summaries are condensed by Gemini when a key is set, locally otherwise
+        api_key = st.session_state.get('api_key')
+        summarizer = gemini_summarizer(api_key) if api_key else local_summary
+        with st.spinner("🧮 Summarizing new days..."):
+            digest = build_digest("marketing", period, summarizer=summarizer)
+        if digest is None:
+            st.info("No stored daily packs for this period yet. Generate some fresh content first!")
+        else:
+            digest['linkedin_post'] = create_linkedin_post(digest['news'], period, digest_label(digest))
+            st.session_state[f'digest_key_{period}'] = store_session_json("digest", digest)
+    
+    key = st.session_state.get(f'digest_key_{period}')
+    digest = get_store().get_json(key) if key else None
+    if digest is not None:
+        st.markdown(f"**{digest_label(digest)}** • {len(digest['days'])} days")
+        cols = st.columns(2)
+        for i, thumbnail in enumerate(get_thumbnails(digest['news'])[0]):
+            with cols[i % 2]:
+                st.image(thumbnail, width="stretch")
+        st.text_area("Roundup LinkedIn post:", digest['linkedin_post'], height=200)
+
+@st.fragment
+def history_panel():
+    """Browse the cards of earlier days from the pack history"""
+    days = [day for day in available_dates("marketing") if day != datetime.now().date()]
+    if not days:
+        return
+    
+    st.subheader("🗂️ Past Days")
+    day = st.selectbox("Day", days, format_func=lambda d: d.strftime('%B %d, %Y'), key="history_day")
+    pack = load_daily_pack("marketing", day)
+    if pack is None:
+        st.info("That day's pack is no longer available.")
+        return
+    
+    # The card footer shows the pack's own date, so it is part of every card key
+    date = datetime.combine(day, datetime.min.time())
+    card_browser(
+        pack['news'],
+        partial(show_card_page, date=date, key=f"history_{day}"),
+        warm=partial(warm_card_page, date=date),
+        key=f"history_{day}"
+    )
 
 # Main App
 def main():
@@ -254,108 +348,64 @@ def main():
     
     # Sidebar for API key
     with st.sidebar:
-        st.header("🔑 Configuration")
-        api_key = st.text_input("Google AI Studio API Key", type="password", 
-                               help="Enter your Google AI Studio API key to generate fresh content")
-        
-        if st.button("🔄 Generate Fresh Content", type="primary"):
-            if api_key:
-                st.session_state['generate_fresh'] = True
-                st.session_state['api_key'] = api_key
-            else:
-                st.error("Please enter your API key first!")
-    
-    # Default sample data
-    default_news = [
-        {"title": "AI-Powered Personalization Boosts E-commerce by 40%", 
-         "content": "Indian brands using AI for personalized recommendations see significant conversion increases"},
-        {"title": "Regional Language Content Drives 60% More Engagement", 
-         "content": "Brands adopting vernacular content strategies outperform English-only campaigns"},
-        {"title": "Social Commerce Reaches ₹3.5 Lakh Crore in India", 
-         "content": "Instagram and WhatsApp shopping features drive massive growth in social selling"},
-        {"title": "Video Marketing Budgets Increase by 50% This Quarter", 
-         "content": "Short-form video content on reels and shorts becomes top priority for marketers"},
-        {"title": "Voice Search Optimization Becomes Critical for Local Brands", 
-         "content": "45% of Indian consumers use voice search for local business discovery"}
-    ]
+        sidebar_config()
     
     # Generate content
     if st.session_state.get('generate_fresh', False) and st.session_state.get('api_key'):
         with st.spinner("🤖 Generating fresh marketing insights..."):
-            ai_response = generate_marketing_news_with_ai(st.session_state['api_key'])
+            overgenerate = st.session_state.get('overgenerate', True)
+            ai_response = generate_marketing_news_with_ai(
+                st.session_state['api_key'], CANDIDATE_COUNT if overgenerate else PACK_SIZE)
             if ai_response:
                 # Show raw response for debugging (remove in production)
                 with st.expander("🔍 Debug: AI Response"):
                     st.text(ai_response)
                 
-                news_items = parse_ai_response(ai_response)
+                if overgenerate:
+                    selection = select_news(parse_ai_response(ai_response, limit=None), MARKETING_RULES)
+                    news_items = selection.news
+                    show_selection_report(selection)
+                else:
+                    news_items = parse_ai_response(ai_response)
                 if len(news_items) >= 3:  # Accept if we get at least 3 items
-                    st.session_state['news_items'] = news_items
+                    save_news_items(news_items)
                     st.session_state['generate_fresh'] = False
                     st.success(f"✅ Generated {len(news_items)} fresh marketing insights!")
                 else:
                     st.warning(f"⚠️ Only parsed {len(news_items)} items. Using default content.")
-                    st.session_state['news_items'] = default_news
+                    st.session_state.pop('news_items', None)
             else:
                 st.error("❌ Failed to generate content. Using default content.")
-                st.session_state['news_items'] = default_news
+                st.session_state.pop('news_items', None)
     
     # Use stored news items or default
-    news_items = st.session_state.get('news_items', default_news)
+    news_items = load_news_items(DEFAULT_NEWS)
+    linkedin_content = create_linkedin_post(news_items)
     
     # Display flash cards in grid
-    st.subheader("📋 Today's Marketing Flash Cards")
-    
-    cols = st.columns(2)
-    images = []
-    
-    for i, item in enumerate(news_items):
-        col_idx = i % 2
-        with cols[col_idx]:
-            # Create and display flash card image
-            img = create_flash_card_image(item['title'], item['content'], i+1, len(news_items))
-            images.append(img)
-            
-            # Convert to displayable format
-            img_buffer = BytesIO()
-            img.save(img_buffer, format='PNG')
-            img_buffer.seek(0)
-            
-            st.image(img_buffer, use_column_width=True)
-            
-            # Download button for individual card
-            st.download_button(
-                label=f"📥 Download Card {i+1}",
-                data=img_buffer.getvalue(),
-                file_name=f"marketing_flash_card_{i+1}.png",
-                mime="image/png",
-                key=f"download_{i}"
-            )
+    card_grid(news_items)
     
     # LinkedIn Post Section
-    st.subheader("📱 Ready-to-Post LinkedIn Content")
-    linkedin_content = create_linkedin_post(news_items)
-    
-    st.markdown(f'<div class="linkedin-post">{linkedin_content}</div>', unsafe_allow_html=True)
-    
-    # Copy button for LinkedIn content
-    st.text_area("Copy this content:", linkedin_content, height=200)
+    linkedin_panel(linkedin_content)
     
     # Download all as ZIP
-    st.subheader("📦 Download Everything")
-    zip_file = create_download_zip(images, linkedin_content)
+    export_panel(news_items, linkedin_content)
     
-    st.download_button(
-        label="📦 Download All Cards + LinkedIn Post (ZIP)",
-        data=zip_file.getvalue(),
-        file_name=f"marketing_flash_cards_{datetime.now().strftime('%Y%m%d')}.zip",
-        mime="application/zip"
-    )
+    # Weekly/monthly roundups from stored daily packs
+    digest_panel()
+    
+    # Cards from earlier days, one page at a time
+    history_panel()
     
     # Footer
     st.markdown("---")
     st.markdown("💡 **Pro Tip:** Use your Google AI Studio API key for fresh, daily content!")
     st.markdown("🔄 Content updates daily • Perfect for consistent LinkedIn posting")
+    
+    # Reported last so it reflects everything rendered on this run
+    with st.sidebar:
+        show_memory_report()
 
 if __name__ == "__main__":
-    main()
+    with profile_rerun("ap"):
+        main()
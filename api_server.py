@@ -0,0 +1,484 @@
+"""Local HTTP API for pack generation, card rendering and exports.
+
+Lets scheduling tools and other internal apps fetch packs and card images
+without going through a browser session. Built on asyncio streams so it has
+no dependencies beyond the ones the Streamlit apps already use.
+
+Endpoints:
+
+- ``POST /packs``: generate one pack, optionally ``{"vertical": "marketing"
+  | "fintech", "region": "India"}``. Without a Google AI Studio key
+  (``--api-key`` or ``GOOGLE_API_KEY``) marketing falls back to the default
+  news, like ap.py.
+- ``POST /packs/batch``: ``{"verticals": [...], "regions": [...]}``, every
+  combination generated concurrently (see async_generation.py)
+- ``GET /packs/{id}``: the pack as JSON
+- ``GET /packs/{id}/cards/{n}?format=png|jpeg|webp``: card ``n`` (1-based)
+- ``GET /packs/{id}/exports/{fmt}``: any format registered in exports.py
+
+Pack ids are content hashes, so every GET response carries an ETag derived
+from its inputs and ``If-None-Match`` is answered with 304 before anything
+is rendered. Card rendering runs in a bounded process pool and export
+compression in a bounded thread pool; Gemini calls use the async API.
+The server uses one key for all requests, since the Gemini client's key is
+process-wide.
+
+Run with ``python api_server.py [--host HOST] [--port PORT]``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+from artifact_store import get_store
+from exports import EXPORT_FORMATS, export_file_name, get_export, pack_version
+from async_generation import GenerationJob, GenerationRun
+from flash_cards import (
+    CARD_FORMATS,
+    DEFAULT_BRAND,
+    DEFAULT_NEWS,
+    card_key,
+    create_linkedin_post,
+    render_card_bytes,
+)
+from render_engine import CardJob, init_worker, job_to_dict, worker_context
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_HEADERS = 100
+KEEPALIVE_TIMEOUT = 15
+# Once a request line has arrived, its headers and body must follow within this
+REQUEST_TIMEOUT = 30
+
+# vertical -> (pack title, export heading, card footer brand, export file prefix)
+PACK_STYLES = {
+    "marketing": ("India Marketing News", "MARKETING INSIGHTS", DEFAULT_BRAND, "marketing_flash_cards"),
+    "fintech": ("India Fintech Flash ⚡", "FINTECH NEWS", "India Fintech Flash", "fintech_flash"),
+}
+
+STATUS_TEXT = {
+    200: "OK",
+    201: "Created",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+}
+
+Request = namedtuple("Request", ["method", "path", "query", "headers", "body"])
+Response = namedtuple("Response", ["status", "headers", "body"])
+
+CARD_ROUTE = re.compile(r"^/packs/([0-9a-f]+)/cards/(\d+)$")
+EXPORT_ROUTE = re.compile(r"^/packs/([0-9a-f]+)/exports/(\w+)$")
+PACK_ROUTE = re.compile(r"^/packs/([0-9a-f]+)$")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def json_response(status, payload, headers=None):
+    body = json.dumps(payload, ensure_ascii=False, indent=2).encode('utf-8')
+    return Response(status, {"Content-Type": "application/json; charset=utf-8", **(headers or {})}, body)
+
+
+def string_field(payload, name, default):
+    value = payload.get(name, default)
+    if not isinstance(value, str) or not value:
+        raise HTTPError(400, f"{name!r} must be a non-empty string")
+    return value
+
+
+def string_list_field(payload, name, default):
+    value = payload.get(name, default)
+    if not isinstance(value, list) or not value or not all(isinstance(v, str) and v for v in value):
+        raise HTTPError(400, f"{name!r} must be a non-empty list of strings")
+    return value
+
+
+def not_modified(request, etag):
+    """True if the client already holds the representation tagged ``etag``"""
+    candidates = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    return etag in candidates or "*" in candidates
+
+
+async def read_line(reader, status, message):
+    """readline() that turns a line over the stream limit into an HTTPError"""
+    try:
+        return await reader.readline()
+    except ValueError:  # LimitOverrunError surfaces as ValueError from readline
+        raise HTTPError(status, message)
+
+
+async def read_request(reader):
+    """Read one HTTP/1.1 request, or return None when the client goes away"""
+    try:
+        request_line = await asyncio.wait_for(
+            read_line(reader, 400, "Request line too long"), KEEPALIVE_TIMEOUT)
+    except asyncio.TimeoutError:
+        return None
+    if not request_line.strip():
+        return None
+
+    try:
+        method, target, _ = request_line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+
+    try:
+        headers, body = await asyncio.wait_for(read_headers_and_body(reader), REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPError(408, "Timed out reading the request")
+
+    url = urlsplit(target)
+    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    return Request(method.upper(), url.path, query, headers, body)
+
+
+async def read_headers_and_body(reader):
+    headers = {}
+    for _ in range(MAX_HEADERS + 1):
+        line = await read_line(reader, 431, "Request header line too long")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(431, "Too many request headers")
+
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length < 0:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return headers, body
+
+
+async def write_response(writer, response, keep_alive):
+    headers = {
+        "Content-Length": str(len(response.body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+        **response.headers,
+    }
+    head = f"HTTP/1.1 {response.status} {STATUS_TEXT.get(response.status, '')}\r\n"
+    head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    writer.write(head.encode('latin-1') + b"\r\n" + response.body)
+    await writer.drain()
+
+
+class FlashCardServer:
+    def __init__(self, api_key=None, render_workers=None, thread_workers=4, max_pending_renders=None):
+        self.api_key = api_key
+        self.render_workers = render_workers = render_workers or os.cpu_count() or 1
+        self.render_pool = self.new_render_pool()
+        self.thread_pool = ThreadPoolExecutor(max_workers=thread_workers)
+        # Bounds how many renders are queued on the pool at once; extra
+        # requests wait here instead of piling up inside the executor
+        self.render_slots = asyncio.Semaphore(max_pending_renders or render_workers * 2)
+        self._inflight = {}
+
+    def new_render_pool(self):
+        # Cards served here are 1x landscape, so that is all the workers warm
+        return ProcessPoolExecutor(max_workers=self.render_workers, mp_context=worker_context(),
+                                   initializer=init_worker, initargs=(("landscape",), (1,)))
+
+    def close(self):
+        self.render_pool.shutdown(cancel_futures=True)
+        self.thread_pool.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HTTPError as e:
+                    await write_response(writer, json_response(e.status, {"error": e.message}), False)
+                    break
+                if request is None:
+                    break
+
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                response = await self.dispatch(request)
+                await write_response(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request):
+        try:
+            if request.path in ("/packs", "/packs/batch"):
+                if request.method != "POST":
+                    raise HTTPError(405, "Use POST to generate packs")
+                if request.path == "/packs/batch":
+                    return await self.create_pack_batch(request)
+                return await self.create_pack(request)
+
+            if request.method != "GET":
+                raise HTTPError(405, "Only GET is supported here")
+
+            match = CARD_ROUTE.match(request.path)
+            if match:
+                return await self.get_card(request, match.group(1), int(match.group(2)))
+            match = EXPORT_ROUTE.match(request.path)
+            if match:
+                return await self.get_pack_export(request, match.group(1), match.group(2))
+            match = PACK_ROUTE.match(request.path)
+            if match:
+                return self.get_pack(request, match.group(1))
+
+            raise HTTPError(404, "Unknown endpoint")
+        except HTTPError as e:
+            return json_response(e.status, {"error": e.message})
+        except Exception as e:
+            return json_response(500, {"error": str(e)})
+
+    def load_pack(self, pack_id):
+        pack = get_store().get_json(f"pack:{pack_id}")
+        if pack is None:
+            raise HTTPError(404, f"Pack {pack_id} not found (it may have expired)")
+        return pack
+
+    def pack_summary(self, pack_id, pack):
+        return {
+            "id": pack_id,
+            "title": pack['title'],
+            "date": pack['date'],
+            "news": pack['news'],
+            "linkedin_post": pack['linkedin_post'],
+            "cards": [f"/packs/{pack_id}/cards/{i}" for i in range(1, len(pack['news']) + 1)],
+            "exports": {fmt: f"/packs/{pack_id}/exports/{fmt}" for fmt in EXPORT_FORMATS},
+        }
+
+    def read_json(self, request):
+        try:
+            payload = json.loads(request.body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Request body must be JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return payload
+
+    def save_pack(self, job, news_items, linkedin_post):
+        """Store a generated pack and return its id"""
+        title, heading, brand, _ = PACK_STYLES[job.vertical]
+        date = datetime.now()
+        pack = {
+            "title": title,
+            "heading": heading,
+            "brand": brand,
+            "vertical": job.vertical,
+            "region": job.region,
+            "date": date.strftime('%Y-%m-%d'),
+            "news": news_items,
+            "linkedin_post": linkedin_post,
+            "card_keys": [card_key(item, i, len(news_items), date, brand)
+                          for i, item in enumerate(news_items, 1)],
+            # Lets the ZIP builder re-render cards evicted from the artifact store
+            "card_jobs": [job_to_dict(CardJob(item['title'], item['content'], i, len(news_items),
+                                              date, brand, scale=1))
+                          for i, item in enumerate(news_items, 1)],
+        }
+        pack_id = pack_version(pack)
+        get_store().put_json(f"pack:{pack_id}", pack)
+        return pack_id, pack
+
+    async def create_pack(self, request):
+        payload = self.read_json(request)
+        job = GenerationJob(string_field(payload, "vertical", "marketing"),
+                            string_field(payload, "region", "India"))
+        if job.vertical not in PACK_STYLES:
+            raise HTTPError(400, f"Unknown vertical {job.vertical!r}")
+
+        if self.api_key:
+            async with GenerationRun(self.api_key, [job]) as run:
+                async for result in run.results():
+                    if result.error:
+                        raise HTTPError(502, f"Error generating content with AI: {result.error}")
+                    pack_id, pack = self.save_pack(job, result.news, result.linkedin_post)
+        elif job.vertical == "marketing":
+            pack_id, pack = self.save_pack(job, DEFAULT_NEWS, create_linkedin_post(DEFAULT_NEWS))
+        else:
+            raise HTTPError(400, "The server has no API key for this vertical")
+
+        return json_response(201, self.pack_summary(pack_id, pack), {"Location": f"/packs/{pack_id}"})
+
+    async def create_pack_batch(self, request):
+        """Generate every vertical x region combination concurrently"""
+        payload = self.read_json(request)
+        if not self.api_key:
+            raise HTTPError(400, "The server has no API key for batch generation")
+
+        verticals = string_list_field(payload, "verticals", ["marketing"])
+        regions = string_list_field(payload, "regions", ["India"])
+        unknown = set(verticals) - set(PACK_STYLES)
+        if unknown:
+            raise HTTPError(400, f"Unknown vertical(s): {', '.join(sorted(unknown))}")
+        jobs = [GenerationJob(vertical, region) for vertical in verticals for region in regions]
+
+        packs, errors, warmups = [], [], []
+        async with GenerationRun(self.api_key, jobs) as run:
+            async for result in run.results():
+                job = {"vertical": result.job.vertical, "region": result.job.region,
+                       "elapsed": round(result.elapsed, 2)}
+                if result.error:
+                    errors.append({**job, "error": result.error})
+                    continue
+                pack_id, pack = self.save_pack(result.job, result.news, result.linkedin_post)
+                packs.append({**job, **self.pack_summary(pack_id, pack)})
+                # Start rendering this pack's cards while the other jobs are still generating
+                warmups.extend(asyncio.ensure_future(self.render_card(pack, i, "png"))
+                               for i in range(1, len(pack['news']) + 1))
+
+        await asyncio.gather(*warmups, return_exceptions=True)
+        return json_response(201 if packs else 502, {"packs": packs, "errors": errors})
+
+    def get_pack(self, request, pack_id):
+        etag = f'"{pack_id}"'
+        if not_modified(request, etag):
+            return Response(304, {"ETag": etag}, b"")
+        pack = self.load_pack(pack_id)
+        return json_response(200, self.pack_summary(pack_id, pack), {"ETag": etag})
+
+    async def get_card(self, request, pack_id, index):
+        fmt = request.query.get("format", "png").lower()
+        if fmt not in CARD_FORMATS:
+            raise HTTPError(400, f"Unknown card format {fmt!r}; use one of {', '.join(CARD_FORMATS)}")
+
+        etag = f'"{pack_id}-{index}-{fmt}"'
+        if not_modified(request, etag):
+            return Response(304, {"ETag": etag}, b"")
+
+        pack = self.load_pack(pack_id)
+        if not 1 <= index <= len(pack['news']):
+            raise HTTPError(404, f"Pack {pack_id} has no card {index}")
+
+        data = await self.render_card(pack, index, fmt)
+        _, mime = CARD_FORMATS[fmt]
+        return Response(200, {"Content-Type": mime, "ETag": etag, "Cache-Control": "private, max-age=86400"}, data)
+
+    async def get_pack_export(self, request, pack_id, fmt):
+        if fmt not in EXPORT_FORMATS:
+            raise HTTPError(404, f"Unknown export format {fmt!r}")
+
+        etag = f'"{pack_id}-{fmt}"'
+        if not_modified(request, etag):
+            return Response(304, {"ETag": etag}, b"")
+
+        pack = self.load_pack(pack_id)
+        pngs = []
+        if fmt == "zip":
+            # Cards render in the bounded process pool, not in the export thread
+            pngs = await asyncio.gather(*(self.render_card(pack, i, "png") for i in range(1, len(pack['news']) + 1)))
+
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(self.thread_pool, self.build_export, fmt, pack, pngs)
+        file_name = export_file_name(fmt, pack, PACK_STYLES[pack['vertical']][3])
+        return Response(200, {
+            "Content-Type": EXPORT_FORMATS[fmt].mime,
+            "Content-Disposition": f'attachment; filename="{file_name}"',
+            "ETag": etag,
+        }, data)
+
+    def build_export(self, fmt, pack, pngs):
+        """Build an export, handing the ZIP builder the PNGs rendered for it"""
+        store = get_store()
+        # Put back right before the build, so the builder finds them even if
+        # other requests evicted them while this one waited for a thread
+        for key, png in zip(pack['card_keys'], pngs):
+            store.put(key, png)
+        return get_export(fmt, pack)
+
+    async def render_card(self, pack, index, fmt):
+        """Card bytes from the artifact store, rendering them in the process pool on a miss"""
+        key = pack['card_keys'][index - 1]
+        if fmt != "png":
+            key = f"{key}:{fmt}"
+
+        data = get_store().get(key)
+        if data is not None:
+            return data
+
+        # Concurrent requests for the same card share a single render
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._render(key, pack, index, fmt))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _render(self, key, pack, index, fmt):
+        item = pack['news'][index - 1]
+        date = datetime.strptime(pack['date'], '%Y-%m-%d')
+        loop = asyncio.get_running_loop()
+        args = (item['title'], item['content'], index, len(pack['news']), date, fmt, pack['brand'])
+        async with self.render_slots:
+            for _ in range(2):
+                pool = self.render_pool
+                try:
+                    data = await loop.run_in_executor(pool, render_card_bytes, *args)
+                    break
+                except BrokenProcessPool:
+                    # A worker died (OOM killer, crash); the pool can't take more work
+                    if self.render_pool is pool:
+                        self.render_pool = self.new_render_pool()
+                        pool.shutdown(wait=False, cancel_futures=True)
+            else:
+                data = await loop.run_in_executor(self.thread_pool, render_card_bytes, *args)
+        get_store().put(key, data)
+        return data
+
+
+async def serve(host, port, api_key=None, render_workers=None, thread_workers=4):
+    app = FlashCardServer(api_key, render_workers=render_workers, thread_workers=thread_workers)
+    server = await asyncio.start_server(app.handle_connection, host, port)
+    print(f"Flash card API listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        app.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP API for flash card packs")
+    parser.add_argument("--host", default=os.environ.get("FLASHCARD_API_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("FLASHCARD_API_PORT", DEFAULT_PORT)))
+    parser.add_argument("--api-key", default=os.environ.get("GOOGLE_API_KEY"),
+                        help="Google AI Studio key used for every generation request")
+    parser.add_argument("--render-workers", type=int, default=None,
+                        help="Processes used for card rendering (default: CPU count)")
+    parser.add_argument("--thread-workers", type=int, default=4,
+                        help="Threads used for export building")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.api_key, args.render_workers, args.thread_workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
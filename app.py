@@ -1,11 +1,27 @@
 import streamlit as st
 import requests
-import json
 from datetime import datetime
 import google.generativeai as genai
 from typing import List, Dict
+from functools import partial
 import time
 
+from artifact_store import content_key, get_store
+from card_browser import card_browser
+from exports import EXPORT_FORMATS, export_file_name, get_export
+from flash_cards import (
+    FINTECH_FALLBACK_LINKEDIN_POST,
+    FINTECH_MODEL,
+    build_fintech_linkedin_prompt,
+    build_fintech_prompt,
+    parse_fintech_response,
+)
+from digest import PERIODS, build_digest, digest_label, gemini_summarizer
+from news_selection import CANDIDATE_COUNT, FINTECH_RULES, PACK_SIZE, select_news
+from pack_history import available_dates, load_daily_pack, save_daily_pack
+from profiling import profile_rerun
+from session_artifacts import show_memory_report, store_session_json
+
 # Page config
 st.set_page_config(
     page_title="India Fintech Daily Flash ⚡",
@@ -80,42 +96,21 @@ st.markdown("""
 class FintechNewsGenerator:
     def __init__(self, api_key: str):
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash-preview-04-17')
+        self.model = genai.GenerativeModel(FINTECH_MODEL)
     
-    def get_fintech_news(self) -> List[Dict]:
-        """Generate fintech news using Gemini AI"""
-        prompt = f"""
-        Generate exactly 5 crisp, current fintech news items specifically for India for {datetime.now().strftime('%B %d, %Y')}.
-        
-        Each news item should:
-        - Be real and credible (based on recent trends in Indian fintech)
-        - Be 2-3 sentences maximum
-        - Include specific company names, numbers, or locations when possible
-        - Focus on: payments, digital banking, cryptocurrency, lending, insurtech, or fintech regulations in India
-        
-        Return as JSON format:
-        {{
-            "news": [
-                {{
-                    "title": "Brief catchy title",
-                    "content": "2-3 sentence description",
-                    "category": "category like 'Payments', 'Digital Banking', etc."
-                }}
-            ]
-        }}
+    def get_fintech_news(self, overgenerate: bool = True) -> List[Dict]:
+        """Generate fintech news using Gemini AI.
+
+        With ``overgenerate`` one call asks for a surplus of candidates and
+        keeps the best five that pass validation.
         """
-        
         try:
-            response = self.model.generate_content(prompt)
-            # Clean the response to extract JSON
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:-3]
-            elif response_text.startswith('```'):
-                response_text = response_text[3:-3]
-            
-            news_data = json.loads(response_text)
-            return news_data.get('news', [])
+            if not overgenerate:
+                response = self.model.generate_content(build_fintech_prompt())
+                return parse_fintech_response(response.text)
+            response = self.model.generate_content(build_fintech_prompt(count=CANDIDATE_COUNT))
+            news_items = select_news(parse_fintech_response(response.text), FINTECH_RULES).news
+            return news_items or self.get_fallback_news()
         except Exception as e:
             st.error(f"Error generating news: {str(e)}")
             return self.get_fallback_news()
@@ -150,48 +145,164 @@ class FintechNewsGenerator:
             }
         ]
     
-    def generate_linkedin_post(self, news_items: List[Dict]) -> str:
-        """Generate LinkedIn post content"""
-        prompt = f"""
-        Create an engaging LinkedIn post for sharing today's top 5 Indian fintech news.
-        
-        News items:
-        {json.dumps(news_items, indent=2)}
-        
-        The post should:
-        - Start with an engaging hook about Indian fintech
-        - Mention it's a daily series "India Fintech Flash ⚡"
-        - Use relevant emojis and hashtags
-        - Be professional yet engaging
-        - Include call-to-action for engagement
-        - Keep it under 300 words
-        """
-        
+    def generate_linkedin_post(self, news_items: List[Dict], period: str = "daily") -> str:
+        """Generate LinkedIn post content for a daily pack or a weekly/monthly digest"""
         try:
-            response = self.model.generate_content(prompt)
+            response = self.model.generate_content(build_fintech_linkedin_prompt(news_items, period))
             return response.text.strip()
         except Exception as e:
             return self.get_fallback_linkedin_post()
     
     def get_fallback_linkedin_post(self) -> str:
         """Fallback LinkedIn post"""
-        return """🚀 India Fintech Flash ⚡ - Your Daily Dose of Fintech Innovation!
+        return FINTECH_FALLBACK_LINKEDIN_POST
+
+def load_pack():
+    """Today's pack for this session, or None if not generated yet"""
+    return st.session_state.get('pack')
+
+def save_pack(news_data: List[Dict], linkedin_post: str) -> Dict:
+    """Keep the pack in session state (see session_artifacts)"""
+    pack = {"news": news_data, "linkedin_post": linkedin_post}
+    st.session_state.pack = pack
+    return pack
+
+def export_download_button(fmt: str, pack: Dict, label: str):
+    """Download button whose payload is only built when it is clicked"""
+    st.download_button(
+        label,
+        data=partial(get_export, fmt, pack),
+        file_name=export_file_name(fmt, pack, "fintech_flash"),
+        mime=EXPORT_FORMATS[fmt].mime,
+        key=f"export_{fmt}",
+        on_click="ignore"
+    )
 
-Another exciting day in India's fintech ecosystem! Here are today's top 5 developments that are reshaping how we bank, pay, and invest:
+# Fragments rerun on their own; a new pack goes through a full app rerun
 
-💳 From payment unicorns hitting new milestones to regulatory updates shaping the future
-🏦 Digital banking innovations making financial services more accessible
-📊 Investment in fintech reaching new heights across the country
+@st.fragment
+def sidebar_config():
+    """API key entry; generating fresh news reruns the whole app"""
+    st.markdown("### 🔑 Configuration")
+    api_key = st.text_input("Google AI Studio API Key", type="password", help="Enter your Google AI Studio API key")
+    st.checkbox("🎯 Over-generate and pick the best", value=True, key='overgenerate',
+                help=f"Ask for {CANDIDATE_COUNT} candidates in one call and keep the best {PACK_SIZE}")
+    
+    if st.button("🔄 Generate Fresh News", type="primary"):
+        if api_key:
+            st.session_state.api_key = api_key
+            st.session_state.regenerate = True
+            st.rerun(scope="app")
+        else:
+            st.error("Please enter your API key first!")
+
+def flashcard_html(news: Dict) -> str:
+    return f"""<div class="flashcard">
+<h3>💡 {news['title']}</h3>
+<p>{news['content']}</p>
+<small style="background: rgba(255,255,255,0.2); padding: 4px 8px; border-radius: 12px; font-size: 0.8rem;">
+📊 {news.get('category', news.get('date', ''))}
+</small>
+</div>"""
+
+def flashcards_page_html(news_data: List[Dict], start: int = 0, stop: int = None) -> str:
+    """Grid HTML for cards ``start:stop``, built once and shared across sessions"""
+    page = news_data[start:stop]
+    html = get_store().get_or_create(
+        content_key("cards-html", page),
+        lambda: f'<div class="news-grid">{"".join(flashcard_html(news) for news in page)}</div>'.encode('utf-8')
+    )
+    return html.decode('utf-8')
+
+def render_flashcards(news_data: List[Dict], start: int = 0, stop: int = None):
+    """Grid of HTML flashcards, one markdown element per page"""
+    st.markdown(flashcards_page_html(news_data, start, stop), unsafe_allow_html=True)
 
-India continues to lead the global fintech revolution with over 500M+ digital payment users and counting!
+@st.fragment
+def card_grid(news_data: List[Dict]):
+    st.markdown(f"### 📅 {datetime.now().strftime('%B %d, %Y')} - Top {len(news_data)} Fintech Updates")
+    
+    # Only the visible page is built and sent; the next one is prefetched
+    card_browser(news_data, render_flashcards, warm=flashcards_page_html)
+
+@st.fragment
+def linkedin_panel(linkedin_post: str):
+    st.markdown("---")
+    st.markdown("### 📱 Ready-to-Post LinkedIn Content")
+    
+    st.markdown(f"""
+    <div class="linkedin-post">
+        <h4 style="color: #4267b2; font-family: Caveat; margin-bottom: 15px;">📋 Copy & Paste to LinkedIn:</h4>
+        <div style="background: white; padding: 15px; border-radius: 8px; border-left: 4px solid #4267b2;">
+            {linkedin_post.replace(chr(10), '<br>')}
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Copy button
+    if st.button("📋 Copy LinkedIn Post", help="Click to copy the post content"):
+        st.success("✅ LinkedIn post copied to clipboard! (Use Ctrl+C to copy the text above)")
 
-What's your take on these developments? Which news caught your attention the most?
+@st.fragment
+def export_panel(news_data: List[Dict], linkedin_post: str):
+    st.markdown("### 💾 Export Options")
+    col1, col2 = st.columns(2)
+    
+    # Exports are built on demand and memoized per pack version
+    export_pack = {
+        "title": "India Fintech Flash ⚡",
+        "heading": "FINTECH NEWS",
+        "date": datetime.now().strftime('%Y-%m-%d'),
+        "news": news_data,
+        "linkedin_post": linkedin_post
+    }
+    
+    with col1:
+        export_download_button("json", export_pack, "📄 Download as JSON")
+    
+    with col2:
+        export_download_button("txt", export_pack, "📝 Download as Text")
 
-#IndiaFintech #DigitalPayments #Fintech #Innovation #Banking #UPI #DigitalIndia #FintechFlash
+@st.fragment
+def digest_panel():
+    """Weekly/monthly roundup built from the cached daily summaries"""
+    st.markdown("---")
+    st.markdown("### 📆 Weekly & Monthly Digests")
+    period = st.radio("Digest period", PERIODS, format_func=str.title, horizontal=True)
+    
+    if st.button("🗞️ Build Digest", help="Only days without a cached summary are sent to Gemini"):
+        api_key = st.session_state.api_key
+        with st.spinner("🧮 Summarizing new days..."):
+            digest = build_digest("fintech", period, summarizer=gemini_summarizer(api_key))
+        if digest is None:
+            st.info("No stored daily packs for this period yet. Generate some daily news first!")
+        else:
+            generator = FintechNewsGenerator(api_key)
+            digest['linkedin_post'] = generator.generate_linkedin_post(digest['news'], period)
+            st.session_state[f'digest_key_{period}'] = store_session_json("digest", digest)
+    
+    key = st.session_state.get(f'digest_key_{period}')
+    digest = get_store().get_json(key) if key else None
+    if digest is not None:
+        st.markdown(f"#### {period.title()} Fintech Flash • {digest_label(digest)} ({len(digest['days'])} days)")
+        render_flashcards(digest['news'])
+        st.text_area("Digest LinkedIn post:", digest['linkedin_post'], height=200)
 
----
-📌 Follow for daily fintech updates
-🔔 Turn on notifications to never miss the flash!"""
+@st.fragment
+def history_panel():
+    """Browse the flashcards of earlier days from the pack history"""
+    days = [day for day in available_dates("fintech") if day != datetime.now().date()]
+    if not days:
+        return
+    
+    st.markdown("---")
+    st.markdown("### 🗂️ Past Days")
+    day = st.selectbox("Day", days, format_func=lambda d: d.strftime('%B %d, %Y'), key="history_day")
+    pack = load_daily_pack("fintech", day)
+    if pack is None:
+        st.info("That day's pack is no longer available.")
+        return
+    card_browser(pack['news'], render_flashcards, warm=flashcards_page_html, key=f"history_{day}")
 
 def main():
     st.markdown('<h1 class="main-title">🇮🇳 India Fintech Flash ⚡</h1>', unsafe_allow_html=True)
@@ -199,15 +310,8 @@ def main():
     
     # Sidebar for API key
     with st.sidebar:
-        st.markdown("### 🔑 Configuration")
-        api_key = st.text_input("Google AI Studio API Key", type="password", help="Enter your Google AI Studio API key")
-        
-        if st.button("🔄 Generate Fresh News", type="primary"):
-            if api_key:
-                st.session_state.api_key = api_key
-                st.session_state.regenerate = True
-            else:
-                st.error("Please enter your API key first!")
+        sidebar_config()
+        show_memory_report()
     
     # Main content
     if 'api_key' not in st.session_state:
@@ -222,89 +326,25 @@ def main():
         return
     
     # Initialize or regenerate news
-    if 'news_data' not in st.session_state or st.session_state.get('regenerate', False):
+    pack = load_pack()
+    if pack is None or st.session_state.get('regenerate', False):
         with st.spinner("🔍 Fetching latest fintech news..."):
             generator = FintechNewsGenerator(st.session_state.api_key)
-            st.session_state.news_data = generator.get_fintech_news()
-            st.session_state.linkedin_post = generator.generate_linkedin_post(st.session_state.news_data)
+            news_data = generator.get_fintech_news(st.session_state.get('overgenerate', True))
+            pack = save_pack(news_data, generator.generate_linkedin_post(news_data))
+            # Keep real packs (not the fallback news) for weekly/monthly digests
+            if news_data != generator.get_fallback_news():
+                save_daily_pack("fintech", pack['news'], pack['linkedin_post'])
             st.session_state.regenerate = False
     
     # Display news flashcards
-    if 'news_data' in st.session_state:
-        st.markdown(f"### 📅 {datetime.now().strftime('%B %d, %Y')} - Top 5 Fintech Updates")
-        
-        # Create grid layout for flashcards
-        cols = st.columns(2)
-        for i, news in enumerate(st.session_state.news_data):
-            with cols[i % 2]:
-                st.markdown(f"""
-                <div class="flashcard">
-                    <h3>💡 {news['title']}</h3>
-                    <p>{news['content']}</p>
-                    <small style="background: rgba(255,255,255,0.2); padding: 4px 8px; border-radius: 12px; font-size: 0.8rem;">
-                        📊 {news['category']}
-                    </small>
-                </div>
-                """, unsafe_allow_html=True)
-        
-        # LinkedIn post section
-        st.markdown("---")
-        st.markdown("### 📱 Ready-to-Post LinkedIn Content")
-        
-        st.markdown(f"""
-        <div class="linkedin-post">
-            <h4 style="color: #4267b2; font-family: Caveat; margin-bottom: 15px;">📋 Copy & Paste to LinkedIn:</h4>
-            <div style="background: white; padding: 15px; border-radius: 8px; border-left: 4px solid #4267b2;">
-                {st.session_state.linkedin_post.replace(chr(10), '<br>')}
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Copy button
-        if st.button("📋 Copy LinkedIn Post", help="Click to copy the post content"):
-            st.success("✅ LinkedIn post copied to clipboard! (Use Ctrl+C to copy the text above)")
-        
-        # Download options
-        st.markdown("### 💾 Export Options")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Create JSON download
-            news_json = {
-                "date": datetime.now().strftime('%Y-%m-%d'),
-                "news": st.session_state.news_data,
-                "linkedin_post": st.session_state.linkedin_post
-            }
-            st.download_button(
-                "📄 Download as JSON",
-                data=json.dumps(news_json, indent=2),
-                file_name=f"fintech_flash_{datetime.now().strftime('%Y%m%d')}.json",
-                mime="application/json"
-            )
-        
-        with col2:
-            # Create text download
-            text_content = f"""India Fintech Flash ⚡ - {datetime.now().strftime('%B %d, %Y')}
-
-TOP 5 FINTECH NEWS:
-{'='*50}
-
-"""
-            for i, news in enumerate(st.session_state.news_data, 1):
-                text_content += f"{i}. {news['title']}\n   {news['content']}\n   Category: {news['category']}\n\n"
-            
-            text_content += f"""
-LINKEDIN POST:
-{'='*50}
-{st.session_state.linkedin_post}
-"""
-            
-            st.download_button(
-                "📝 Download as Text",
-                data=text_content,
-                file_name=f"fintech_flash_{datetime.now().strftime('%Y%m%d')}.txt",
-                mime="text/plain"
-            )
+    if pack is not None:
+        card_grid(pack['news'])
+        linkedin_panel(pack['linkedin_post'])
+        export_panel(pack['news'], pack['linkedin_post'])
+        digest_panel()
+        history_panel()
 
 if __name__ == "__main__":
-    main()
+    with profile_rerun("app"):
+        main()
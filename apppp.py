@@ -5,6 +5,12 @@ from datetime import datetime
 import json
 import re
 
+from news_selection import CANDIDATE_COUNT, FINTECH_RULES, MARKETING_RULES, select_news
+from profiling import profile_rerun
+
+# This page mixes fintech and marketing news, so either topic counts as relevant
+NEWS_RULES = FINTECH_RULES._replace(keywords=FINTECH_RULES.keywords + MARKETING_RULES.keywords)
+
 # Page config
 st.set_page_config(
     page_title="Fintech Flash ⚡ India",
@@ -107,7 +113,7 @@ def get_fintech_news(api_key):
         model = genai.GenerativeModel('gemini-2.5-flash-preview-04-17')
         
         prompt = f"""
-        Generate exactly 5 crisp, current fintech and marketing news items specifically for India for {datetime.now().strftime('%B %d, %Y')}. 
+        Generate exactly {CANDIDATE_COUNT} distinct, crisp, current fintech and marketing news items specifically for India for {datetime.now().strftime('%B %d, %Y')}. 
         
         Focus on:
         - Digital payments (UPI, wallets, etc.)
@@ -158,7 +164,7 @@ def parse_news_content(content):
                     'content': content_text
                 })
     
-    return news_items[:5]  # Ensure only 5 items
+    return news_items
 
 def generate_linkedin_post(news_items):
     """Generate LinkedIn post content"""
@@ -209,7 +215,8 @@ def main():
                     news_content = get_fintech_news(api_key)
                     
                     if news_content:
-                        news_items = parse_news_content(news_content)
+                        # The prompt asks for a surplus; keep the best 5 that pass validation
+                        news_items = select_news(parse_news_content(news_content), NEWS_RULES).news
                         
                         if len(news_items) >= 3:  # Ensure we have sufficient content
                             # Display flashcards
@@ -261,4 +268,5 @@ def main():
             """)
 
 if __name__ == "__main__":
-    main()
+    with profile_rerun("apppp"):
+        main()
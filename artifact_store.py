@@ -0,0 +1,158 @@
+"""Process-wide, byte-budgeted store for session artifacts.
+
+Streamlit sessions used to keep full PIL images, PNG buffers and whole packs
+in ``st.session_state``, so memory grew linearly with concurrent users. The
+apps now keep only small string keys per session and put the bytes here.
+Entries are evicted least-recently-used once the global budget is exceeded
+and, when a spill directory is configured, written to disk instead of
+dropped.
+
+Configuration (environment variables):
+
+- ``ARTIFACT_STORE_BUDGET_MB``: in-memory budget, default 256
+- ``ARTIFACT_STORE_SPILL_DIR``: directory for evicted entries, unset = drop
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_BUDGET_MB = 256
+
+
+def content_key(kind, *parts):
+    """Deterministic key for an artifact derived from JSON-serialisable inputs"""
+    digest = hashlib.sha256(
+        json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    ).hexdigest()
+    return f"{kind}:{digest[:24]}"
+
+
+class ArtifactStore:
+    def __init__(self, budget_bytes, spill_dir=None):
+        self.budget_bytes = budget_bytes
+        self.spill_dir = spill_dir
+        self._memory = OrderedDict()  # key -> bytes, oldest first
+        self._spilled = {}  # key -> (path, size)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._memory or key in self._spilled
+
+    def put(self, key, data):
+        """Store ``data`` (bytes) under ``key`` and return the key"""
+        with self._lock:
+            self._discard(key)
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            self._enforce_budget()
+        return key
+
+    def get(self, key):
+        """Return the bytes stored under ``key``, or None if evicted/unknown"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            if key not in self._spilled:
+                return None
+            path, _ = self._spilled.pop(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                return None
+            os.remove(path)
+            # Promote back into memory as the most recently used entry
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            self._enforce_budget()
+            return data
+
+    def get_or_create(self, key, factory):
+        """Return the artifact under ``key``, building it with ``factory()`` if missing"""
+        data = self.get(key)
+        if data is None:
+            data = factory()
+            self.put(key, data)
+        return data
+
+    def put_json(self, key, obj):
+        return self.put(key, json.dumps(obj, ensure_ascii=False).encode('utf-8'))
+
+    def get_json(self, key):
+        data = self.get(key)
+        return None if data is None else json.loads(data.decode('utf-8'))
+
+    def report(self, keys):
+        """Memory report for a set of keys (typically the ones a session holds)"""
+        report = {"artifacts": 0, "memory_bytes": 0, "spilled_bytes": 0, "missing": 0}
+        with self._lock:
+            for key in set(keys):
+                if key in self._memory:
+                    report["artifacts"] += 1
+                    report["memory_bytes"] += len(self._memory[key])
+                elif key in self._spilled:
+                    report["artifacts"] += 1
+                    report["spilled_bytes"] += self._spilled[key][1]
+                else:
+                    report["missing"] += 1
+        return report
+
+    def stats(self):
+        """Process-wide totals"""
+        with self._lock:
+            return {
+                "artifacts": len(self._memory) + len(self._spilled),
+                "memory_bytes": self._memory_bytes,
+                "spilled_bytes": sum(size for _, size in self._spilled.values()),
+                "budget_bytes": self.budget_bytes,
+            }
+
+    def _discard(self, key):
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        if key in self._spilled:
+            path, _ = self._spilled.pop(key)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _enforce_budget(self):
+        while self._memory_bytes > self.budget_bytes and self._memory:
+            key, data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(data)
+            if self.spill_dir:
+                self._spill(key, data)
+
+    def _spill(self, key, data):
+        path = os.path.join(self.spill_dir, hashlib.sha256(key.encode('utf-8')).hexdigest())
+        try:
+            with open(path, 'wb') as f:
+                f.write(data)
+        except OSError:
+            return
+        self._spilled[key] = (path, len(data))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide store shared by all sessions"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            budget_mb = float(os.environ.get("ARTIFACT_STORE_BUDGET_MB", DEFAULT_BUDGET_MB))
+            _store = ArtifactStore(
+                int(budget_mb * 1024 * 1024),
+                spill_dir=os.environ.get("ARTIFACT_STORE_SPILL_DIR") or None,
+            )
+        return _store
@@ -0,0 +1,168 @@
+"""Concurrent pack generation on Gemini's async API.
+
+The apps call the blocking ``generate_content``, so a run covering several
+verticals or regional variants costs the sum of every request. Here each
+``GenerationJob`` runs as its own task on ``generate_content_async`` and its
+result is yielded, already parsed, as soon as it finishes. A multi-pack run
+then takes about as long as its slowest request::
+
+    async with GenerationRun(api_key, jobs) as run:
+        async for result in run.results():
+            ...  # render result.news while the other jobs are still running
+
+Leaving the ``async with`` block cancels whatever is still running, and
+``run.cancel(job)`` cancels a single job.
+
+``genai.configure`` sets one key for the whole process, so runs with
+different keys never overlap: a run waits until every run using another key
+has finished.
+"""
+import asyncio
+import time
+from collections import namedtuple
+
+import google.generativeai as genai
+
+from flash_cards import (
+    FINTECH_FALLBACK_LINKEDIN_POST,
+    FINTECH_MODEL,
+    MARKETING_MODEL,
+    build_fintech_linkedin_prompt,
+    build_fintech_prompt,
+    build_marketing_prompt,
+    create_linkedin_post,
+    parse_ai_response,
+    parse_fintech_response,
+)
+from news_selection import CANDIDATE_COUNT, FINTECH_RULES, MARKETING_RULES, select_news
+
+DEFAULT_TIMEOUT = 90
+DEFAULT_CONCURRENCY = 8
+
+GenerationJob = namedtuple("GenerationJob", ["vertical", "region"])
+
+# ``error`` is None on success; ``elapsed`` is wall-clock seconds for the job
+PackResult = namedtuple("PackResult", ["job", "news", "linkedin_post", "error", "elapsed"])
+
+
+async def generate_marketing(region):
+    model = genai.GenerativeModel(MARKETING_MODEL)
+    response = await model.generate_content_async(build_marketing_prompt(region, CANDIDATE_COUNT))
+    candidates = parse_ai_response(response.text, limit=None)
+    news_items = select_news(candidates, MARKETING_RULES._replace(region=region)).news
+    if len(news_items) < 3:
+        raise ValueError(f"Only {len(news_items)} usable items in the AI response")
+    return news_items, create_linkedin_post(news_items)
+
+
+async def generate_fintech(region):
+    model = genai.GenerativeModel(FINTECH_MODEL)
+    response = await model.generate_content_async(build_fintech_prompt(region, CANDIDATE_COUNT))
+    candidates = parse_fintech_response(response.text)
+    news_items = select_news(candidates, FINTECH_RULES._replace(region=region)).news
+    if not news_items:
+        raise ValueError("No usable news items in the AI response")
+    try:
+        post = await model.generate_content_async(build_fintech_linkedin_prompt(news_items))
+        linkedin_post = post.text.strip()
+    except Exception:
+        linkedin_post = FINTECH_FALLBACK_LINKEDIN_POST
+    return news_items, linkedin_post
+
+
+# vertical -> coroutine function taking the region and returning (news, post)
+VERTICALS = {
+    "marketing": generate_marketing,
+    "fintech": generate_fintech,
+}
+
+
+class _KeyGate:
+    """Lets concurrent runs share the process-wide Gemini key, one key at a time"""
+
+    def __init__(self):
+        self._loop = None
+        self._condition = None
+        self._key = None
+        self._runs = 0
+
+    async def acquire(self, api_key):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # asyncio primitives belong to one event loop
+            self._loop, self._condition, self._runs = loop, asyncio.Condition(), 0
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._runs == 0 or self._key == api_key)
+            if self._runs == 0:
+                genai.configure(api_key=api_key)
+                self._key = api_key
+            self._runs += 1
+
+    async def release(self):
+        async with self._condition:
+            self._runs -= 1
+            if self._runs == 0:
+                self._condition.notify_all()
+
+
+_key_gate = _KeyGate()
+
+
+class GenerationRun:
+    def __init__(self, api_key, jobs, timeout=DEFAULT_TIMEOUT, max_concurrency=DEFAULT_CONCURRENCY):
+        unknown = {job.vertical for job in jobs} - set(VERTICALS)
+        if unknown:
+            raise ValueError(f"Unknown vertical(s): {', '.join(sorted(unknown))}")
+        self.api_key = api_key
+        self.jobs = list(dict.fromkeys(jobs))
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._tasks = {}
+
+    async def __aenter__(self):
+        await _key_gate.acquire(self.api_key)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._started = time.perf_counter()
+        self._tasks = {
+            job: asyncio.create_task(self._run(job), name=f"generate-{job.vertical}-{job.region}")
+            for job in self.jobs
+        }
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # Structured concurrency: no job outlives the run
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        await _key_gate.release()
+
+    def cancel(self, job):
+        """Cancel one job; it is reported with error "cancelled". Returns False if it already finished"""
+        task = self._tasks.get(job)
+        return task.cancel() if task else False
+
+    async def results(self):
+        """Yield a PackResult for every job as soon as it finishes"""
+        jobs_by_task = {task: job for job, task in self._tasks.items()}
+        pending = set(jobs_by_task)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled():
+                    elapsed = time.perf_counter() - self._started
+                    yield PackResult(jobs_by_task[task], [], "", "cancelled", elapsed)
+                else:
+                    yield task.result()
+
+    async def _run(self, job):
+        start = time.perf_counter()
+        try:
+            async with self._semaphore:
+                news_items, linkedin_post = await asyncio.wait_for(
+                    VERTICALS[job.vertical](job.region), self.timeout)
+        except asyncio.TimeoutError:
+            return PackResult(job, [], "", f"timed out after {self.timeout}s", time.perf_counter() - start)
+        except Exception as e:
+            return PackResult(job, [], "", str(e), time.perf_counter() - start)
+        return PackResult(job, news_items, linkedin_post, None, time.perf_counter() - start)
+
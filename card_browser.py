@@ -0,0 +1,92 @@
+"""Paginated card browser for large packs and past days.
+
+Only the visible page of cards is rendered and sent to the browser. While
+it is on screen, the next page is warmed in a background thread, so paging
+forward is usually a cache hit. Page weight and server CPU follow what is
+visible, not the size of the pack::
+
+    card_browser(news_items, show_page, warm=warm_page, key="today")
+
+``show_page(news_items, start, stop)`` draws cards ``start:stop``.
+``warm(news_items, start, stop)`` fills the artifact store for a page. It
+runs off the script thread, so it must not call Streamlit.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from artifact_store import content_key
+
+CARDS_PER_PAGE = 6
+
+# One worker: prefetching is opportunistic and shouldn't compete with the
+# pages people are actually looking at
+_prefetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="card-prefetch")
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def prefetch(job_id, fn, *args):
+    """Run ``fn(*args)`` in the background unless ``job_id`` is already queued"""
+    with _pending_lock:
+        if job_id in _pending:
+            return None
+        _pending.add(job_id)
+
+    def run():
+        try:
+            fn(*args)
+        finally:
+            with _pending_lock:
+                _pending.discard(job_id)
+    return _prefetch_pool.submit(run)
+
+
+def page_count(total, per_page=CARDS_PER_PAGE):
+    return max(1, -(-total // per_page))
+
+
+def page_bounds(total, page, per_page=CARDS_PER_PAGE):
+    start = page * per_page
+    return start, min(start + per_page, total)
+
+
+def _turn_page(state_key, delta):
+    st.session_state[state_key] = st.session_state.get(state_key, 0) + delta
+
+
+def pager(total, key, per_page=CARDS_PER_PAGE):
+    """Previous/next controls; returns the current page, 0-based"""
+    pages = page_count(total, per_page)
+    state_key = f"{key}_page"
+    # The pack may have shrunk since the page was chosen
+    page = min(st.session_state.get(state_key, 0), pages - 1)
+    st.session_state[state_key] = page
+    if pages == 1:
+        return page
+
+    start, stop = page_bounds(total, page, per_page)
+    prev_col, label_col, next_col = st.columns([1, 2, 1])
+    prev_col.button("◀ Previous", key=f"{key}_prev", disabled=page == 0,
+                    on_click=_turn_page, args=(state_key, -1))
+    next_col.button("Next ▶", key=f"{key}_next", disabled=page == pages - 1,
+                    on_click=_turn_page, args=(state_key, 1))
+    label_col.markdown(
+        f'<p style="text-align: center;">Page {page + 1} of {pages} • cards {start + 1}–{stop} of {total}</p>',
+        unsafe_allow_html=True
+    )
+    return page
+
+
+def card_browser(news_items, show_page, warm=None, key="cards", per_page=CARDS_PER_PAGE):
+    """Show one page of ``news_items`` and warm the next one in the background"""
+    total = len(news_items)
+    page = pager(total, key, per_page)
+    start, stop = page_bounds(total, page, per_page)
+    show_page(news_items, start, stop)
+
+    if warm is not None and stop < total:
+        next_start, next_stop = page_bounds(total, page + 1, per_page)
+        job_id = content_key("prefetch", key, news_items[next_start:next_stop], next_start, total)
+        prefetch(job_id, warm, news_items, next_start, next_stop)
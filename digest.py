@@ -0,0 +1,164 @@
+"""Weekly and monthly digests assembled from cached daily summaries.
+
+Each stored daily pack is condensed into a compact summary exactly once and
+cached next to it (``<vertical>/summaries/YYYY-MM-DD.json``). Building a
+digest only summarizes days that have no cached summary yet, or whose pack
+was regenerated since. Everything else is read from the cache. Raw items
+are never resent to Gemini for a whole week.
+
+Summaries come from a ``summarizer(pack) -> list of items`` callable:
+``local_summary`` trims the day's top items without any API call, and
+``gemini_summarizer(api_key)`` asks Gemini to pick and condense them. Each
+cached summary records which kind produced it. A local summary, including
+the fallback used when a Gemini call fails, is redone the next time a
+Gemini summarizer asks for that day.
+"""
+import calendar
+import os
+from datetime import date, timedelta
+
+import google.generativeai as genai
+
+from artifact_store import content_key
+from flash_cards import MARKETING_MODEL, parse_ai_response
+from news_selection import normalize_title
+from pack_history import load_daily_pack, read_json, vertical_dir, write_json
+
+SUMMARY_ITEMS = 3
+SUMMARY_CONTENT_CHARS = 160
+DIGEST_ITEMS = 5
+
+PERIODS = ("weekly", "monthly")
+
+
+def period_range(period, end_day=None):
+    """First and last day of the week (Mon-Sun) or month containing ``end_day``"""
+    end_day = end_day or date.today()
+    if period == "weekly":
+        start = end_day - timedelta(days=end_day.weekday())
+        return start, start + timedelta(days=6)
+    if period == "monthly":
+        last = calendar.monthrange(end_day.year, end_day.month)[1]
+        return end_day.replace(day=1), end_day.replace(day=last)
+    raise ValueError(f"Unknown digest period {period!r}; use one of {', '.join(PERIODS)}")
+
+
+def _shorten(text, limit=SUMMARY_CONTENT_CHARS):
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0].rstrip(",;:.") + "…"
+
+
+def local_summary(pack):
+    """Keep the day's leading items with trimmed descriptions"""
+    items = []
+    for item in pack['news'][:SUMMARY_ITEMS]:
+        summary_item = {"title": item['title'], "content": _shorten(item['content'])}
+        if item.get('category'):
+            summary_item['category'] = item['category']
+        items.append(summary_item)
+    return items
+
+
+local_summary.kind = "local"
+
+
+def gemini_summarizer(api_key):
+    """Summarizer asking Gemini for the day's most important items (one small call per day)"""
+    def summarize(pack):
+        """Raises if the call fails or yields nothing usable"""
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel(MARKETING_MODEL)
+        news_lines = "\n".join(f"- {item['title']}: {item['content']}" for item in pack['news'])
+        prompt = f"""
+        From these news items of {pack['date']}, pick the {SUMMARY_ITEMS} most important
+        for a weekly roundup and condense each one.
+
+        {news_lines}
+
+        For each item, provide:
+        TITLE: [headline, max 60 characters]
+        CONTENT: [one sentence, max 140 characters]
+        """
+        items = parse_ai_response(model.generate_content(prompt).text)[:SUMMARY_ITEMS]
+        if not items:
+            raise ValueError("No summary items in the AI response")
+        return items
+    summarize.kind = "gemini"
+    return summarize
+
+
+def _summary_path(vertical, day):
+    return os.path.join(vertical_dir(vertical, "summaries"), f"{day.isoformat()}.json")
+
+
+def daily_summary(vertical, day, summarizer=local_summary):
+    """Cached summary for one day, or None if no pack was stored that day"""
+    pack = load_daily_pack(vertical, day)
+    if pack is None:
+        return None
+
+    version = content_key("pack", pack)
+    kind = getattr(summarizer, "kind", "local")
+    cached = read_json(_summary_path(vertical, day))
+    # A Gemini summary is good enough for any caller; a local one only for local callers
+    if (cached and cached.get("pack_version") == version
+            and cached.get("summarizer") in (kind, "gemini")):
+        return cached
+
+    try:
+        items = summarizer(pack)
+    except Exception:
+        # Keep the digest buildable; cached as local so Gemini is retried next time
+        kind, items = "local", local_summary(pack)
+    summary = {"date": day.isoformat(), "pack_version": version, "summarizer": kind, "items": items}
+    write_json(_summary_path(vertical, day), summary)
+    return summary
+
+
+def build_digest(vertical, period, end_day=None, summarizer=local_summary, max_items=DIGEST_ITEMS):
+    """Assemble a weekly or monthly digest from the cached daily summaries.
+
+    Items are taken round-robin across days, newest day first, skipping
+    duplicate headlines, so one busy day can't crowd out the rest of the
+    period. Returns None if no day in the period has a stored pack.
+    """
+    start, end = period_range(period, end_day)
+    end = min(end, date.today())
+
+    summaries = []
+    day = end
+    while day >= start:
+        summary = daily_summary(vertical, day, summarizer)
+        if summary and summary['items']:
+            summaries.append(summary)
+        day -= timedelta(days=1)
+    if not summaries:
+        return None
+
+    news, seen = [], set()
+    for rank in range(max(len(s['items']) for s in summaries)):
+        for summary in summaries:
+            if rank >= len(summary['items']) or len(news) >= max_items:
+                continue
+            item = summary['items'][rank]
+            key = normalize_title(item['title'])
+            if key not in seen:
+                seen.add(key)
+                news.append({**item, "date": summary['date']})
+
+    return {
+        "vertical": vertical,
+        "period": period,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "days": [s['date'] for s in summaries],
+        "news": news,
+    }
+
+
+def digest_label(digest):
+    """Human-readable date range, e.g. "Oct 13 – Oct 19, 2026" """
+    start = date.fromisoformat(digest['start'])
+    end = date.fromisoformat(digest['end'])
+    return f"{start.strftime('%b %d')} – {end.strftime('%b %d, %Y')}"
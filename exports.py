@@ -0,0 +1,121 @@
+"""On-demand export builders for packs.
+
+Exports are built only when a download is requested and memoized in the
+artifact store per pack version, so reruns that nobody downloads from don't
+pay for serialization or compression. New formats plug in with
+``register_export``::
+
+    @register_export("csv", mime="text/csv", extension="csv")
+    def build_csv(pack):
+        ...
+
+A pack is a JSON-serialisable dict with ``title``, ``date`` (ISO format),
+``news`` and ``linkedin_post``; the ZIP format also reads ``card_keys``,
+the artifact store keys of the rendered card PNGs, and optionally
+``card_names``, their file names inside the archive, and ``card_jobs``,
+``render_engine.job_to_dict`` specs used to render cards that aren't in
+the store.
+"""
+import json
+import zipfile
+from collections import namedtuple
+from datetime import datetime
+from io import BytesIO
+
+from artifact_store import content_key, get_store
+from render_engine import get_engine, job_from_dict
+
+ExportFormat = namedtuple("ExportFormat", ["name", "mime", "extension", "builder"])
+
+EXPORT_FORMATS = {}
+
+
+def register_export(name, mime, extension):
+    """Register ``builder(pack) -> bytes`` as the builder for an export format"""
+    def decorator(builder):
+        EXPORT_FORMATS[name] = ExportFormat(name, mime, extension, builder)
+        return builder
+    return decorator
+
+
+def pack_version(pack):
+    """Content hash identifying a pack; exports are memoized per version"""
+    return content_key("pack", pack).split(":", 1)[1]
+
+
+def _export_key(fmt, pack):
+    return f"export:{fmt}:{pack_version(pack)}"
+
+
+def get_export(fmt, pack):
+    """Return the export bytes for ``pack``, building them on first request"""
+    export_format = EXPORT_FORMATS[fmt]
+    return get_store().get_or_create(_export_key(fmt, pack), lambda: export_format.builder(pack))
+
+
+def export_file_name(fmt, pack, prefix):
+    date = datetime.strptime(pack['date'], '%Y-%m-%d').strftime('%Y%m%d')
+    return f"{prefix}_{date}.{EXPORT_FORMATS[fmt].extension}"
+
+
+@register_export("json", mime="application/json", extension="json")
+def build_json(pack):
+    news_json = {
+        "date": pack['date'],
+        "news": pack['news'],
+        "linkedin_post": pack['linkedin_post']
+    }
+    return json.dumps(news_json, indent=2).encode('utf-8')
+
+
+@register_export("txt", mime="text/plain", extension="txt")
+def build_text(pack):
+    date = datetime.strptime(pack['date'], '%Y-%m-%d').strftime('%B %d, %Y')
+    text_content = f"""{pack['title']} - {date}
+
+TOP {len(pack['news'])} {pack.get('heading', 'NEWS')}:
+{'='*50}
+
+"""
+    for i, news in enumerate(pack['news'], 1):
+        text_content += f"{i}. {news['title']}\n   {news['content']}\n"
+        if news.get('category'):
+            text_content += f"   Category: {news['category']}\n"
+        text_content += "\n"
+
+    text_content += f"""
+LINKEDIN POST:
+{'='*50}
+{pack['linkedin_post']}
+"""
+    return text_content.encode('utf-8')
+
+
+@register_export("zip", mime="application/zip", extension="zip")
+def build_zip(pack):
+    """ZIP with all card PNGs and the LinkedIn post"""
+    store = get_store()
+    card_keys = pack.get('card_keys', [])
+    card_names = pack.get('card_names') or [f'flash_card_{i}.png' for i in range(1, len(card_keys) + 1)]
+    card_jobs = pack.get('card_jobs') or [None] * len(card_keys)
+
+    pngs = [store.get(key) for key in card_keys]
+    missing = [i for i, png in enumerate(pngs) if png is None]
+    if missing:
+        # Cards not rendered yet (or evicted) are rendered in one batch
+        if any(card_jobs[i] is None for i in missing):
+            raise LookupError(f"{card_names[missing[0]]} is no longer in the artifact store")
+        results = get_engine().render(job_from_dict(card_jobs[i]) for i in missing)
+        for i, result in zip(missing, results):
+            store.put(card_keys[i], result.data)
+            store.put(f"{card_keys[i]}:thumb", result.thumbnail)
+            pngs[i] = result.data
+
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for name, png in zip(card_names, pngs):
+            zip_file.writestr(name, png)
+
+        zip_file.writestr('linkedin_post.txt', pack['linkedin_post'])
+
+    return zip_buffer.getvalue()
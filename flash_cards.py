@@ -0,0 +1,354 @@
+"""Flash card generation, parsing and rendering shared by ap.py and the API server.
+
+Nothing in here touches Streamlit, so it can be imported from the HTTP
+service and from render worker processes without setting up a page.
+"""
+from datetime import datetime
+from functools import lru_cache
+import json
+from io import BytesIO
+import os
+import textwrap
+
+import google.generativeai as genai
+from PIL import Image, ImageDraw
+
+from artifact_store import content_key
+from font_index import draw_text
+
+MARKETING_MODEL = 'gemini-2.0-flash'
+FINTECH_MODEL = 'gemini-2.5-flash-preview-04-17'
+
+DEFAULT_BRAND = "India Marketing News"
+
+# Default sample data
+DEFAULT_NEWS = [
+    {"title": "AI-Powered Personalization Boosts E-commerce by 40%", 
+     "content": "Indian brands using AI for personalized recommendations see significant conversion increases"},
+    {"title": "Regional Language Content Drives 60% More Engagement", 
+     "content": "Brands adopting vernacular content strategies outperform English-only campaigns"},
+    {"title": "Social Commerce Reaches ₹3.5 Lakh Crore in India", 
+     "content": "Instagram and WhatsApp shopping features drive massive growth in social selling"},
+    {"title": "Video Marketing Budgets Increase by 50% This Quarter", 
+     "content": "Short-form video content on reels and shorts becomes top priority for marketers"},
+    {"title": "Voice Search Optimization Becomes Critical for Local Brands", 
+     "content": "45% of Indian consumers use voice search for local business discovery"}
+]
+
+# period -> (series name, time frame) used in the marketing LinkedIn post
+MARKETING_POST_PERIODS = {
+    "daily": ("Daily Marketing Flash", "Today"),
+    "weekly": ("Weekly Marketing Roundup", "This Week"),
+    "monthly": ("Monthly Marketing Roundup", "This Month"),
+}
+
+# period -> (time frame, series description) used in the fintech post prompt
+FINTECH_POST_PERIODS = {
+    "daily": ("today's", "a daily series"),
+    "weekly": ("this week's", "the weekly roundup of the daily series"),
+    "monthly": ("this month's", "the monthly roundup of the daily series"),
+}
+
+# Base card sizes; landscape is the original 800x600 card
+CARD_SIZES = {
+    "landscape": (800, 600),
+    "square": (1080, 1080),
+    "portrait": (1080, 1350),
+}
+
+# Cards offered for download are rendered at this multiple of their base size,
+# and the grid shows a thumbnail downscaled from that same render. High-DPI
+# (e.g. 2) is opt-in, since every grid render then pays for the larger card
+DOWNLOAD_SCALE = int(os.environ.get("FLASHCARD_DOWNLOAD_SCALE", 1))
+THUMBNAIL_WIDTH = 480
+THUMBNAIL_QUALITY = 70
+
+# Card encodings offered for download; PNG is what the UI has always used
+CARD_FORMATS = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+@lru_cache(maxsize=16)
+def gradient_template(width, height):
+    """Background gradient for a card size, drawn once and copied per card"""
+    img = Image.new('RGB', (width, height), color='white')
+    draw = ImageDraw.Draw(img)
+    for y in range(height):
+        r = int(102 + (118 - 102) * y / height)
+        g = int(126 + (75 - 126) * y / height)
+        b = int(234 + (162 - 234) * y / height)
+        draw.line([(0, y), (width, y)], fill=(r, g, b))
+    return img
+
+def create_flash_card_image(title, content, index, total=5, date=None, brand=DEFAULT_BRAND,
+                            scale=1, variant="landscape"):
+    """Create a flash card image with sketch font styling.
+
+    ``variant`` picks the base size from CARD_SIZES and ``scale`` multiplies
+    it, e.g. 2 for a high-DPI 1600x1200 landscape card. Typography follows
+    the card width, so every variant wraps text the same way.
+    """
+    date = date or datetime.now()
+    
+    # Card dimensions
+    base_width, base_height = CARD_SIZES[variant]
+    width, height = base_width * scale, base_height * scale
+    s = width / 800
+    
+    def px(value):
+        return round(value * s)
+    
+    # Copy of the cached gradient background
+    img = gradient_template(width, height).copy()
+    draw = ImageDraw.Draw(img)
+    
+    # Text is drawn through the font fallback index so ₹ and Indic scripts
+    # render even when the primary font has no glyphs for them
+    
+    # Draw card number
+    draw_text(draw, (px(50), px(50)), f"{index}", px(48), 'white')
+    
+    # Draw title with text wrapping
+    title_wrapped = textwrap.fill(title, width=35)
+    draw_text(draw, (px(50), px(120)), title_wrapped, px(32), 'white')
+    
+    # Draw content with text wrapping
+    content_wrapped = textwrap.fill(content, width=50)
+    draw_text(draw, (px(50), px(250)), content_wrapped, px(20), 'white')
+    
+    # Add decorative elements
+    draw.rectangle([px(30), height-px(80), width-px(30), height-px(30)], outline='white', width=px(3))
+    draw_text(draw, (px(50), height-px(65)), f"{brand} • {date.strftime('%B %d, %Y')}", 
+              px(20), 'white')
+    
+    return img
+
+def build_marketing_prompt(region="India", count=5):
+    """Prompt asking Gemini for ``count`` of today's marketing news items"""
+    return f"""
+        Create exactly {count} distinct marketing news items for {region} on {datetime.now().strftime('%B %d, %Y')}. 
+        
+        For each item, provide:
+        - A compelling headline (max 50 characters)
+        - A brief description (max 100 characters)
+        
+        Focus on current trends in:
+        - Digital marketing in {region}
+        - Brand campaigns and consumer insights
+        - Social media and e-commerce marketing
+        - Marketing technology and AI adoption
+        - Regional marketing strategies
+        
+        Format your response exactly like this example:
+
+        1. TITLE: AI Marketing Tools Boost ROI by 35%
+        CONTENT: Indian startups adopting AI-driven marketing see higher conversions and reduced costs.
+
+        2. TITLE: Regional Content Drives 50% More Engagement  
+        CONTENT: Brands using local languages in campaigns outperform English-only content significantly.
+
+        3. TITLE: Social Commerce Hits ₹4 Lakh Crore Mark
+        CONTENT: Instagram Shopping and WhatsApp Business drive massive growth in social selling.
+
+        4. TITLE: Video Marketing Budgets Double This Year
+        CONTENT: Short-form video content becomes top priority for 80% of Indian marketers.
+
+        5. TITLE: Voice Search Changes Local Marketing Game
+        CONTENT: 60% of consumers use voice search for local business discovery and reviews.
+
+        Please follow this exact format with TITLE: and CONTENT: labels.
+        """
+
+def generate_marketing_news(api_key, count=5):
+    """Generate marketing news using Google AI Studio API.
+
+    Errors from the API are raised to the caller.
+    """
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(MARKETING_MODEL)
+    response = model.generate_content(build_marketing_prompt(count=count))
+    return response.text
+
+def build_fintech_prompt(region="India", count=5):
+    """Prompt asking Gemini for ``count`` of today's fintech news items as JSON"""
+    return f"""
+        Generate exactly {count} distinct, crisp, current fintech news items specifically for {region} for {datetime.now().strftime('%B %d, %Y')}.
+        
+        Each news item should:
+        - Be real and credible (based on recent trends in Indian fintech)
+        - Be 2-3 sentences maximum
+        - Include specific company names, numbers, or locations when possible
+        - Focus on: payments, digital banking, cryptocurrency, lending, insurtech, or fintech regulations in {region}
+        
+        Return as JSON format:
+        {{
+            "news": [
+                {{
+                    "title": "Brief catchy title",
+                    "content": "2-3 sentence description",
+                    "category": "category like 'Payments', 'Digital Banking', etc."
+                }}
+            ]
+        }}
+        """
+
+def parse_fintech_response(response_text):
+    """Parse the JSON fintech response; raises ValueError if it isn't JSON"""
+    # Clean the response to extract JSON
+    response_text = response_text.strip()
+    if response_text.startswith('```json'):
+        response_text = response_text[7:-3]
+    elif response_text.startswith('```'):
+        response_text = response_text[3:-3]
+    
+    news_data = json.loads(response_text)
+    return news_data.get('news', [])
+
+def build_fintech_linkedin_prompt(news_items, period="daily"):
+    """Prompt asking Gemini for a LinkedIn post sharing the fintech news"""
+    when, series = FINTECH_POST_PERIODS[period]
+    return f"""
+        Create an engaging LinkedIn post for sharing {when} top {len(news_items)} Indian fintech news.
+        
+        News items:
+        {json.dumps(news_items, indent=2)}
+        
+        The post should:
+        - Start with an engaging hook about Indian fintech
+        - Mention it's {series} "India Fintech Flash ⚡"
+        - Use relevant emojis and hashtags
+        - Be professional yet engaging
+        - Include call-to-action for engagement
+        - Keep it under 300 words
+        """
+
+FINTECH_FALLBACK_LINKEDIN_POST = """🚀 India Fintech Flash ⚡ - Your Daily Dose of Fintech Innovation!
+
+Another exciting day in India's fintech ecosystem! Here are today's top 5 developments that are reshaping how we bank, pay, and invest:
+
+💳 From payment unicorns hitting new milestones to regulatory updates shaping the future
+🏦 Digital banking innovations making financial services more accessible
+📊 Investment in fintech reaching new heights across the country
+
+India continues to lead the global fintech revolution with over 500M+ digital payment users and counting!
+
+What's your take on these developments? Which news caught your attention the most?
+
+#IndiaFintech #DigitalPayments #Fintech #Innovation #Banking #UPI #DigitalIndia #FintechFlash
+
+---
+📌 Follow for daily fintech updates
+🔔 Turn on notifications to never miss the flash!"""
+
+def parse_ai_response(response_text, limit=5):
+    """Parse AI response into structured news items with improved error handling
+
+    ``limit=None`` keeps every parsed item, for over-generated candidates.
+    """
+    news_items = []
+    
+    # Try multiple parsing strategies
+    if not response_text:
+        return []
+    
+    # Strategy 1: Look for numbered items with TITLE/CONTENT format
+    lines = response_text.strip().split('\n')
+    current_item = {}
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+            
+        if line.startswith('TITLE:') or 'TITLE:' in line:
+            if current_item and 'title' in current_item and 'content' in current_item:
+                news_items.append(current_item)
+            title = line.split('TITLE:')[-1].strip()
+            current_item = {'title': title}
+        elif line.startswith('CONTENT:') or 'CONTENT:' in line:
+            if current_item:
+                content = line.split('CONTENT:')[-1].strip()
+                current_item['content'] = content
+    
+    # Add the last item
+    if current_item and 'title' in current_item and 'content' in current_item:
+        news_items.append(current_item)
+    
+    # Strategy 2: If first strategy didn't work, try simpler parsing
+    if len(news_items) < 3:
+        news_items = []
+        # Split by numbered items
+        sections = response_text.split('\n\n')
+        for section in sections:
+            if limit is not None and len(news_items) >= limit:
+                break
+            lines = section.strip().split('\n')
+            if len(lines) >= 2:
+                title = lines[0].strip()
+                # Clean up title (remove numbers, bullets, etc.)
+                title = title.lstrip('0123456789. -•').strip()
+                if title.startswith('TITLE:'):
+                    title = title.replace('TITLE:', '').strip()
+                
+                content = ' '.join(lines[1:]).strip()
+                if content.startswith('CONTENT:'):
+                    content = content.replace('CONTENT:', '').strip()
+                
+                if title and content and len(title) > 10:
+                    news_items.append({'title': title, 'content': content})
+    
+    return news_items[:limit]  # Ensure we only get 5 items unless asked for more
+
+def create_linkedin_post(news_items, period="daily", date_label=None):
+    """Generate LinkedIn post content for a daily pack or a weekly/monthly digest"""
+    date_label = date_label or datetime.now().strftime('%B %d, %Y')
+    series, when = MARKETING_POST_PERIODS[period]
+    
+    post_content = f"""🚀 {series} ⚡ | {date_label}
+
+Top {len(news_items)} Marketing Insights for India {when}:
+
+"""
+    
+    for i, item in enumerate(news_items, 1):
+        post_content += f"{i}. {item['title']}\n   {item['content']}\n\n"
+    
+    post_content += """💡 Which trend excites you the most?
+
+#MarketingIndia #DigitalMarketing #MarketingTrends #IndiaMarketing #MarketingInsights #MarketingStrategy #BrandMarketing
+
+---
+Generated with AI • Follow for daily marketing insights"""
+    
+    return post_content
+
+def encode_card(img, fmt="png"):
+    """Encode a card image in one of CARD_FORMATS"""
+    pil_format, _ = CARD_FORMATS[fmt]
+    buffer = BytesIO()
+    img.save(buffer, format=pil_format)
+    return buffer.getvalue()
+
+def render_card_bytes(title, content, index, total=5, date=None, fmt="png", brand=DEFAULT_BRAND,
+                      variant="landscape"):
+    """Render a flash card and encode it in one of CARD_FORMATS"""
+    img = create_flash_card_image(title, content, index, total, date, brand, variant=variant)
+    return encode_card(img, fmt)
+
+def make_thumbnail(img, width=THUMBNAIL_WIDTH):
+    """Small, cheaply encoded JPEG preview of a rendered card"""
+    thumb = img.copy()
+    # reducing_gap lets Pillow shrink with a fast integer reduce first
+    thumb.thumbnail((width, width), reducing_gap=2.0)
+    buffer = BytesIO()
+    thumb.save(buffer, format='JPEG', quality=THUMBNAIL_QUALITY)
+    return buffer.getvalue()
+
+def card_key(item, index, total, date=None, brand=DEFAULT_BRAND, scale=1, variant="landscape"):
+    """Artifact store key of a rendered card (its thumbnail lives under ``key + ":thumb"``)"""
+    # The footer carries the brand and date, so they are part of the key
+    date = date or datetime.now()
+    return content_key("card", item['title'], item['content'], index, total,
+                       date.strftime('%Y-%m-%d'), brand, scale, variant)
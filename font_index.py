@@ -0,0 +1,230 @@
+"""Font fallback for flash card rendering.
+
+The fonts ap.py used to load (plain ``arial.ttf``) have no glyphs for ₹ or
+for Indic scripts, so regional-language cards came out as boxes. This module
+builds a coverage index (codepoint -> font file) once per process over the
+fonts in ``FONT_FALLBACK_CHAIN`` plus any font directories configured by the
+deployment, and splits text into runs by covering font at layout time.
+
+Shaping (Indic matras and conjuncts, Arabic joining) needs Pillow's RAQM
+layout. Pillow's wheels bundle libraqm and HarfBuzz but load FriBiDi from
+the system, so install it (``apt install libfribidi0``, ``brew install
+fribidi``); source builds also need libraqm itself. Without it Pillow's
+BASIC layout draws the right glyphs unshaped, and a warning is logged once
+per process.
+"""
+import logging
+import os
+import unicodedata
+from functools import lru_cache
+
+from PIL import ImageFont, features
+
+try:
+    from fontTools.ttLib import TTCollection, TTFont
+except ImportError:  # fontTools is optional; without it only the primary font is used
+    TTFont = None
+    TTCollection = None
+
+# Fonts are tried in this order; the first one covering a codepoint wins.
+FONT_FALLBACK_CHAIN = [
+    "arial.ttf",
+    "Arial.ttf",
+    "DejaVuSans.ttf",
+    "NotoSans-Regular.ttf",
+    "NotoSansDevanagari-Regular.ttf",
+    "NotoSansBengali-Regular.ttf",
+    "NotoSansGujarati-Regular.ttf",
+    "NotoSansGurmukhi-Regular.ttf",
+    "NotoSansOriya-Regular.ttf",
+    "NotoSansTamil-Regular.ttf",
+    "NotoSansTelugu-Regular.ttf",
+    "NotoSansKannada-Regular.ttf",
+    "NotoSansMalayalam-Regular.ttf",
+    "Nirmala.ttf",
+    "Mangal.ttf",
+]
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+SYSTEM_FONT_DIRS = [
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    os.path.expanduser("~/.fonts"),
+    os.path.expanduser("~/.local/share/fonts"),
+    "/Library/Fonts",
+    "/System/Library/Fonts",
+    os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+]
+
+# Every font file found in these directories is indexed after the chain fonts:
+# chain names first, then regular faces, then styled ones (see _face_rank).
+PROJECT_FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+
+# Zero-width joiners/non-joiners must stay in the run of the text they join
+JOINERS = {"\u200c", "\u200d"}
+
+LINE_SPACING = 4
+
+# Filename tokens of faces that shouldn't claim coverage ahead of a regular face
+STYLED_FACE_TOKENS = ("bold", "italic", "oblique", "light", "thin", "black", "heavy",
+                      "medium", "semibold", "condensed", "narrow", "mono", "code")
+
+logger = logging.getLogger(__name__)
+
+if features.check("raqm"):
+    LAYOUT_ENGINE = ImageFont.Layout.RAQM
+else:
+    LAYOUT_ENGINE = ImageFont.Layout.BASIC
+    logger.warning("libraqm is not available to Pillow; Indic and other complex scripts "
+                   "will render without shaping (install FriBiDi, or libraqm for source builds)")
+
+
+def _extra_font_dirs():
+    """Font directories added through FLASHCARD_FONT_DIRS plus the bundled fonts/ dir"""
+    dirs = [PROJECT_FONT_DIR]
+    extra = os.environ.get("FLASHCARD_FONT_DIRS", "")
+    dirs.extend(d for d in extra.split(os.pathsep) if d)
+    return dirs
+
+
+def _walk_fonts(directory):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.lower().endswith(FONT_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def _face_rank(path):
+    """Sort key for fonts from the extra directories: chain fonts, regular, styled"""
+    name = os.path.basename(path)
+    if name in FONT_FALLBACK_CHAIN:
+        return (0, FONT_FALLBACK_CHAIN.index(name))
+    stem = os.path.splitext(name)[0].lower()
+    # "RegularItalic" is still italic, so only the style tokens count
+    return (2, 0) if any(token in stem for token in STYLED_FACE_TOKENS) else (1, 0)
+
+
+def discover_fonts():
+    """Return the available font files in fallback order"""
+    by_name = {}
+    for directory in SYSTEM_FONT_DIRS:
+        if os.path.isdir(directory):
+            for path in _walk_fonts(directory):
+                by_name.setdefault(os.path.basename(path), path)
+
+    ordered = [by_name[name] for name in FONT_FALLBACK_CHAIN if name in by_name]
+
+    extra = []
+    for directory in _extra_font_dirs():
+        if os.path.isdir(directory):
+            extra.extend(_walk_fonts(directory))
+    # Stable sort, so directory and filename order still break ties
+    ordered.extend(sorted(extra, key=_face_rank))
+
+    seen = set()
+    return [p for p in ordered if not (p in seen or seen.add(p))]
+
+
+def _font_codepoints(path):
+    """Codepoints covered by the cmap of a font file"""
+    if TTFont is None:
+        return set()
+    try:
+        if path.lower().endswith(".ttc"):
+            font = TTCollection(path, lazy=True).fonts[0]
+        else:
+            font = TTFont(path, lazy=True)
+        cmap = font.getBestCmap() or {}
+        font.close()
+        return set(cmap)
+    except Exception:
+        return set()
+
+
+@lru_cache(maxsize=1)
+def coverage_index():
+    """Build the codepoint -> font path index once per process.
+
+    Returns a tuple ``(fonts, index)`` where ``fonts`` is the fallback chain
+    actually available and ``index`` maps each covered codepoint to the first
+    font in that chain containing it.
+    """
+    fonts = discover_fonts()
+    index = {}
+    for path in fonts:
+        for codepoint in _font_codepoints(path):
+            index.setdefault(codepoint, path)
+    return tuple(fonts), index
+
+
+def primary_font_path():
+    fonts, _ = coverage_index()
+    return fonts[0] if fonts else None
+
+
+@lru_cache(maxsize=4096)
+def font_for_char(char):
+    """Font path covering ``char``, or None if no available font has it"""
+    _, index = coverage_index()
+    return index.get(ord(char))
+
+
+# Fallback fonts x text sizes x card sizes and scales adds up quickly
+@lru_cache(maxsize=256)
+def get_font(path, size):
+    """Load (and cache) a font at the given size"""
+    if path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(path, size, layout_engine=LAYOUT_ENGINE)
+
+
+def _sticks_to_run(char):
+    # Combining marks (matras, viramas, nuktas) and joiners must be shaped
+    # together with their base character, whitespace just follows the text
+    return char in JOINERS or char.isspace() or unicodedata.category(char).startswith("M")
+
+
+def split_runs(text):
+    """Split text into ``(run, font_path)`` pieces by covering font"""
+    primary = primary_font_path()
+    runs = []
+    current_font = None
+    current = []
+
+    for char in text:
+        if current and _sticks_to_run(char):
+            current.append(char)
+            continue
+        font = font_for_char(char) or current_font or primary
+        if current and font != current_font:
+            runs.append(("".join(current), current_font))
+            current = []
+        current_font = font
+        current.append(char)
+
+    if current:
+        runs.append(("".join(current), current_font))
+    return runs
+
+
+def draw_text(draw, xy, text, size, fill):
+    """Draw (multi-line) text, switching fonts per run so every glyph renders"""
+    primary = primary_font_path()
+    if primary is None:
+        # No TrueType fonts available at all: keep the old bitmap-font behaviour
+        draw.text(xy, text, fill=fill, font=ImageFont.load_default())
+        return
+
+    base_font = get_font(primary, size)
+    ascent, descent = base_font.getmetrics()
+    x0, y = xy
+
+    for line in text.split("\n"):
+        x = x0
+        baseline = y + ascent
+        for run, path in split_runs(line):
+            font = get_font(path, size)
+            draw.text((x, baseline), run, fill=fill, font=font, anchor="ls")
+            x += font.getlength(run)
+        y += ascent + descent + LINE_SPACING
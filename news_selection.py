@@ -0,0 +1,152 @@
+"""Over-generate-and-select: pick a full pack from a surplus of candidates.
+
+Asking Gemini for exactly five items means a single malformed, overlong or
+repeated item leaves the pack short, and the only fix is another full API
+call. Instead the prompts ask for ``CANDIDATE_COUNT`` items. ``select_news``
+then drops the ones that fail local validation (missing fields, length
+limits, duplicates) and ranks the rest with a cheap keyword and specificity
+score. The top ``PACK_SIZE`` become the pack, so one round trip is almost
+always enough::
+
+    selection = select_news(parse_ai_response(text, limit=None), MARKETING_RULES)
+    news_items = selection.news
+"""
+import re
+from collections import namedtuple
+
+PACK_SIZE = 5
+CANDIDATE_COUNT = 10
+
+# Titles or descriptions with this word overlap (Jaccard) are duplicates
+DUPLICATE_OVERLAP = 0.6
+
+# Hard limits reject a candidate, soft limits only lower its score
+SelectionRules = namedtuple("SelectionRules", [
+    "title_chars",        # (min, max) hard limits
+    "content_chars",      # (min, max) hard limits
+    "soft_title_chars",
+    "soft_content_chars",
+    "keywords",           # topic words that make an item relevant
+    "region",
+])
+
+MARKETING_RULES = SelectionRules(
+    title_chars=(10, 80),
+    content_chars=(20, 220),
+    soft_title_chars=50,
+    soft_content_chars=100,
+    keywords=("digital", "marketing", "brand", "campaign", "consumer", "social", "e-commerce",
+              "ecommerce", "influencer", "video", "ai", "martech", "advertising", "ad", "regional",
+              "engagement", "customer", "commerce", "content"),
+    region="India",
+)
+
+FINTECH_RULES = SelectionRules(
+    title_chars=(10, 100),
+    content_chars=(40, 450),
+    soft_title_chars=60,
+    soft_content_chars=300,
+    keywords=("upi", "payments", "payment", "digital", "bank", "banking", "neobank", "rbi",
+              "crypto", "cryptocurrency", "lending", "loan", "credit", "insurtech", "insurance",
+              "regulation", "regulatory", "fintech", "wallet", "funding", "startup", "sebi", "npci"),
+    region="India",
+)
+
+Selection = namedtuple("Selection", ["news", "candidate_count", "rejected"])
+
+_MARKDOWN = re.compile(r"[*_`#]+")
+_WORD = re.compile(r"\w+")
+_FIGURE = re.compile(r"\d|[%₹$]")
+
+
+def normalize_title(title):
+    return re.sub(r"\W+", " ", title.lower()).strip()
+
+
+def _words(text):
+    return set(_WORD.findall(text.lower()))
+
+
+def _overlap(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _clean(text):
+    return " ".join(_MARKDOWN.sub("", str(text)).split())
+
+
+def validate_candidates(items, rules):
+    """Return ``(valid, rejected)``; rejected holds ``(item, reason)`` pairs"""
+    valid, rejected = [], []
+    seen = []
+    for item in items:
+        title = _clean(item.get('title', ''))
+        content = _clean(item.get('content', ''))
+        if not title or not content:
+            rejected.append((item, "missing title or content"))
+            continue
+        if not rules.title_chars[0] <= len(title) <= rules.title_chars[1]:
+            rejected.append((item, f"title length {len(title)}"))
+            continue
+        if not rules.content_chars[0] <= len(content) <= rules.content_chars[1]:
+            rejected.append((item, f"content length {len(content)}"))
+            continue
+
+        title_words, content_words = _words(title), _words(content)
+        duplicate = any(
+            normalize_title(title) == normalize_title(other['title'])
+            or _overlap(title_words, other_title) >= DUPLICATE_OVERLAP
+            or _overlap(content_words, other_content) >= DUPLICATE_OVERLAP
+            for other, other_title, other_content in seen
+        )
+        if duplicate:
+            rejected.append((item, "duplicate"))
+            continue
+
+        cleaned = {**item, 'title': title, 'content': content}
+        seen.append((cleaned, title_words, content_words))
+        valid.append(cleaned)
+    return valid, rejected
+
+
+def relevance_score(item, rules):
+    """Cheap local relevance: topic keywords, concrete figures, region, length fit"""
+    words = _words(f"{item['title']} {item['content']}")
+    score = len(words & set(rules.keywords))
+    # Specific numbers and amounts make better flash cards than vague trends
+    score += min(len(_FIGURE.findall(item['content'])), 4) * 0.5
+    if _FIGURE.search(item['title']):
+        score += 1
+    if rules.region.lower() in words:
+        score += 1
+    if len(item['title']) > rules.soft_title_chars:
+        score -= 1
+    if len(item['content']) > rules.soft_content_chars:
+        score -= 1
+    return score
+
+
+def select_news(candidates, rules, count=PACK_SIZE):
+    """Validate and rank ``candidates`` and keep the best ``count``.
+
+    Ties keep the model's own order. A category that is already in the pack
+    counts against later items, so the pack covers more than one topic.
+    """
+    valid, rejected = validate_candidates(candidates, rules)
+    # Earlier candidates get a small bonus, since the model lists its best first
+    scores = [relevance_score(item, rules) - position * 0.05 for position, item in enumerate(valid)]
+
+    news, categories = [], {}
+    remaining = list(range(len(valid)))
+    while remaining and len(news) < count:
+        def adjusted(i):
+            return scores[i] - categories.get(valid[i].get('category'), 0)
+        best = max(remaining, key=adjusted)
+        remaining.remove(best)
+        news.append(valid[best])
+        category = valid[best].get('category')
+        if category:
+            categories[category] = categories.get(category, 0) + 1
+    return Selection(news, len(candidates), rejected)
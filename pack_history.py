@@ -0,0 +1,75 @@
+"""On-disk history of daily packs, one JSON file per vertical and day.
+
+Packs are saved whenever fresh content is generated. A later generation on
+the same day overwrites the earlier one. Digests and history browsing read
+them back from here.
+
+Layout under ``FLASHCARD_HISTORY_DIR`` (default ``history/``)::
+
+    <vertical>/packs/YYYY-MM-DD.json
+"""
+import json
+import os
+import tempfile
+from datetime import date, datetime
+
+HISTORY_DIR = os.environ.get("FLASHCARD_HISTORY_DIR", "history")
+
+
+def vertical_dir(vertical, kind):
+    return os.path.join(HISTORY_DIR, vertical, kind)
+
+
+def write_json(path, obj):
+    """Write JSON atomically so concurrent sessions never read half a file"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Sessions are threads of one process, so the temp name must be unique per write
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory,
+                                     suffix=".tmp", delete=False) as f:
+        try:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+        except Exception:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _pack_path(vertical, day):
+    return os.path.join(vertical_dir(vertical, "packs"), f"{day.isoformat()}.json")
+
+
+def save_daily_pack(vertical, news, linkedin_post, day=None):
+    """Record the pack generated for ``day`` (default today)"""
+    day = day or date.today()
+    pack = {"date": day.isoformat(), "news": news, "linkedin_post": linkedin_post}
+    write_json(_pack_path(vertical, day), pack)
+    return pack
+
+
+def load_daily_pack(vertical, day):
+    return read_json(_pack_path(vertical, day))
+
+
+def available_dates(vertical):
+    """Days with a stored pack, newest first"""
+    directory = vertical_dir(vertical, "packs")
+    if not os.path.isdir(directory):
+        return []
+    days = []
+    for name in os.listdir(directory):
+        if name.endswith(".json"):
+            try:
+                days.append(datetime.strptime(name[:-5], "%Y-%m-%d").date())
+            except ValueError:
+                continue
+    return sorted(days, reverse=True)
@@ -0,0 +1,164 @@
+"""On-demand CPU and allocation profiling of a single Streamlit rerun.
+
+Each page wraps its ``main()`` in ``profile_rerun(page)``. Nothing is
+measured unless a capture has been requested, either by
+
+- starting the server with ``FLASHCARD_PROFILE_NEXT=1``, which profiles the
+  first rerun served by the process, or
+- setting ``FLASHCARD_ADMIN_TOKEN`` and opening the page with
+  ``?admin=<token>``, which adds a "Profile next rerun" button to the
+  sidebar.
+
+A capture runs the rerun under cProfile and tracemalloc, saves a ``.pstats``
+file and a top-allocations report to ``FLASHCARD_PROFILE_DIR`` (default
+``profiles/``) and shows the hottest functions in the page. tracemalloc is
+process-wide, so allocations from other sessions running at the same time
+show up in the report too.
+"""
+import cProfile
+import hmac
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+PROFILE_DIR = os.environ.get("FLASHCARD_PROFILE_DIR", "profiles")
+TOP_FUNCTIONS = 20
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+
+_env_capture_pending = os.environ.get("FLASHCARD_PROFILE_NEXT") == "1"
+_env_lock = threading.Lock()
+# tracemalloc and (on 3.12+) the profiler are process-wide, so one capture at a time
+_capture_lock = threading.Lock()
+
+
+def is_admin():
+    """True if the page was opened with the configured admin token"""
+    token = os.environ.get("FLASHCARD_ADMIN_TOKEN")
+    supplied = st.query_params.get("admin", "")
+    # Compare bytes: compare_digest raises TypeError on non-ASCII str
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def _request_capture():
+    st.session_state['profile_next_rerun'] = True
+
+
+def _capture_requested():
+    global _env_capture_pending
+    if st.session_state.pop('profile_next_rerun', False):
+        return True
+    with _env_lock:
+        if _env_capture_pending:
+            _env_capture_pending = False
+            return True
+    return False
+
+
+def _admin_controls():
+    with st.sidebar:
+        st.markdown("### 🧪 Profiling")
+        # on_click runs before the rerun the click triggers, so that rerun is the one captured
+        st.button("🧪 Profile next rerun", on_click=_request_capture,
+                  help="Capture CPU and allocations for one rerun of this page")
+
+
+def _function_rows(profiler):
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        if filename == __file__:
+            continue
+        rows.append({
+            "function": name,
+            "location": f"{os.path.basename(filename)}:{line}",
+            "calls": ncalls,
+            "own (ms)": round(tottime * 1000, 2),
+            "cumulative (ms)": round(cumtime * 1000, 2),
+        })
+    rows.sort(key=lambda row: row["cumulative (ms)"], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+
+def _allocation_lines(snapshot):
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    return [str(stat) for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]]
+
+
+def _save_capture(page, profiler, snapshot, elapsed):
+    """Write the capture files and return a summary for display"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stem = os.path.join(PROFILE_DIR, f"{page}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+    profiler.dump_stats(f"{stem}.pstats")
+
+    allocations = _allocation_lines(snapshot)
+    with open(f"{stem}-alloc.txt", "w", encoding="utf-8") as f:
+        f.write(f"Top {TOP_ALLOCATIONS} allocation sites for one rerun of {page} ({elapsed:.3f}s)\n\n")
+        f.write("\n".join(allocations) + "\n")
+
+    return {
+        "page": page,
+        "elapsed": elapsed,
+        "pstats_path": f"{stem}.pstats",
+        "alloc_path": f"{stem}-alloc.txt",
+        "functions": _function_rows(profiler),
+        "allocations": allocations[:10],
+    }
+
+
+def _show_summary(summary):
+    with st.expander(f"🧪 Profile of this rerun • {summary['elapsed'] * 1000:.0f} ms", expanded=True):
+        st.caption(f"Saved {summary['pstats_path']} and {summary['alloc_path']}")
+        st.dataframe(summary["functions"])
+        st.markdown("**Top allocations**")
+        st.code("\n".join(summary["allocations"]) or "(none)")
+
+
+@contextmanager
+def profile_rerun(page):
+    """Profile this rerun of ``page`` if a capture was requested"""
+    if is_admin():
+        _admin_controls()
+    if not _capture_requested():
+        yield
+        return
+
+    if not _capture_lock.acquire(blocking=False):
+        st.warning("🧪 Another profile capture is in progress; try again shortly.")
+        yield
+        return
+
+    try:
+        # Someone else may already be tracing; only stop tracemalloc if we started it
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+: a profiler outside this module is already active
+            if started_tracing:
+                tracemalloc.stop()
+            st.warning("🧪 Another profiler is active in this process; capture skipped.")
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            summary = _save_capture(page, profiler, snapshot, elapsed)
+    finally:
+        _capture_lock.release()
+    _show_summary(summary)
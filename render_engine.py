@@ -0,0 +1,165 @@
+"""Parallel card rendering for large packs and multi-size variants.
+
+``RenderEngine.render(jobs)`` splits card jobs across a process pool and
+returns the encoded cards in job order. Each worker builds the font coverage
+index and loads the fonts and gradient template of the default card size
+once at start-up; other sizes are cached the first time they are drawn.
+Workers are started from a forkserver, never forked from the multithreaded
+Streamlit process. Packs smaller than ``PARALLEL_THRESHOLD`` render in-process,
+because shipping them to workers costs more than drawing them. Every
+result carries its own render time.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from flash_cards import (
+    CARD_SIZES,
+    DEFAULT_BRAND,
+    DOWNLOAD_SCALE,
+    create_flash_card_image,
+    encode_card,
+    gradient_template,
+    make_thumbnail,
+)
+from font_index import coverage_index, get_font, primary_font_path
+
+PARALLEL_THRESHOLD = 8
+
+# Font sizes used by the card layout at 1x; warmed per scale in each worker
+CARD_FONT_SIZES = (20, 32, 48)
+
+
+CardJob = namedtuple(
+    "CardJob",
+    ["title", "content", "index", "total", "date", "brand", "variant", "scale", "fmt"],
+    defaults=(None, DEFAULT_BRAND, "landscape", DOWNLOAD_SCALE, "png"),
+)
+
+# ``data`` is the encoded card, ``thumbnail`` a JPEG preview, ``seconds`` the render time
+RenderedCard = namedtuple("RenderedCard", ["job", "data", "thumbnail", "seconds"])
+
+
+def job_to_dict(job):
+    """JSON-friendly CardJob, for packs that must be able to re-render their cards"""
+    spec = job._asdict()
+    if spec['date'] is not None:
+        spec['date'] = spec['date'].strftime('%Y-%m-%d')
+    return spec
+
+
+def job_from_dict(spec):
+    date = spec.get('date')
+    return CardJob(**{**spec, 'date': datetime.strptime(date, '%Y-%m-%d') if date else None})
+
+
+def init_worker(variants=("landscape",), scales=(DOWNLOAD_SCALE,)):
+    """Shared per-process set-up: font index, fonts and gradient templates.
+
+    Only the given sizes are warmed; each template is several MB per worker.
+    """
+    coverage_index()
+    primary = primary_font_path()
+    for scale in set(scales):
+        for base_width, base_height in (CARD_SIZES[variant] for variant in variants):
+            width, height = base_width * scale, base_height * scale
+            gradient_template(width, height)
+            if primary is not None:
+                for size in CARD_FONT_SIZES:
+                    get_font(primary, round(size * width / 800))
+
+
+def worker_context():
+    """Start method for render workers; forking a multithreaded process can deadlock"""
+    return multiprocessing.get_context("forkserver")
+
+
+def render_job(job):
+    """Render one job; top-level so it can be sent to worker processes"""
+    start = time.perf_counter()
+    img = create_flash_card_image(job.title, job.content, job.index, job.total, job.date,
+                                  job.brand, job.scale, job.variant)
+    data = encode_card(img, job.fmt)
+    thumbnail = make_thumbnail(img)
+    return RenderedCard(job, data, thumbnail, time.perf_counter() - start)
+
+
+class RenderEngine:
+    def __init__(self, max_workers=None, parallel_threshold=PARALLEL_THRESHOLD):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=worker_context(), initializer=init_worker)
+            return self._pool
+
+    def _drop_pool(self, pool):
+        """Forget a broken ``pool`` so the next render starts a fresh one"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def is_parallel(self, job_count):
+        return job_count >= self.parallel_threshold and self.max_workers > 1
+
+    def render(self, jobs):
+        """Render ``jobs`` and return their RenderedCards in the same order"""
+        jobs = list(jobs)
+        if not self.is_parallel(len(jobs)):
+            return [render_job(job) for job in jobs]
+        # A few chunks per worker keeps IPC overhead low while still balancing load
+        chunksize = max(1, len(jobs) // (self.max_workers * 4))
+        for _ in range(2):
+            pool = self._get_pool()
+            try:
+                return list(pool.map(render_job, jobs, chunksize=chunksize))
+            except BrokenProcessPool:
+                # A worker died (OOM killer, crash); the pool can't take more work
+                self._drop_pool(pool)
+        return [render_job(job) for job in jobs]
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+def timing_report(results, elapsed, parallel):
+    """Summary of a render batch for display"""
+    slowest = max(results, key=lambda r: r.seconds, default=None)
+    return {
+        "cards": len(results),
+        "elapsed": elapsed,
+        "parallel": parallel,
+        "total_render_seconds": sum(r.seconds for r in results),
+        "slowest": None if slowest is None else {
+            "index": slowest.job.index, "variant": slowest.job.variant, "seconds": slowest.seconds},
+        "per_card": [{"card": r.job.index, "variant": r.job.variant, "ms": round(r.seconds * 1000, 1)}
+                     for r in results],
+    }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The process-wide render engine (worker count from FLASHCARD_RENDER_WORKERS)"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            workers = os.environ.get("FLASHCARD_RENDER_WORKERS")
+            _engine = RenderEngine(max_workers=int(workers) if workers else None)
+        return _engine
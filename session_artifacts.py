@@ -0,0 +1,43 @@
+"""Per-session bookkeeping for artifacts held in the shared store.
+
+The artifact store is process-wide; each session only records which keys it
+is using, so the sidebar can report what that session holds. A session's
+current pack is not an artifact: it is small and can't be rebuilt without
+another Gemini call, so the pages keep it in session state.
+"""
+import streamlit as st
+
+from artifact_store import content_key, get_store
+
+
+def remember_artifact(key):
+    """Record an artifact key as held by the current session"""
+    keys = st.session_state.setdefault('artifact_keys', [])
+    if key not in keys:
+        keys.append(key)
+
+
+def store_session_json(kind, obj):
+    """Put a JSON artifact into the shared store and record it as held by this session"""
+    key = content_key(kind, obj)
+    get_store().put_json(key, obj)
+    remember_artifact(key)
+    return key
+
+
+def show_memory_report():
+    """Sidebar report of what this session holds in the artifact store"""
+    store = get_store()
+    report = store.report(st.session_state.get('artifact_keys', []))
+    stats = store.stats()
+    with st.expander("🧠 Session Memory"):
+        st.markdown(
+            f"**This session:** {report['artifacts']} artifacts • "
+            f"{report['memory_bytes'] / 1024:.1f} KB in memory • "
+            f"{report['spilled_bytes'] / 1024:.1f} KB on disk"
+        )
+        st.markdown(
+            f"**Server:** {stats['artifacts']} artifacts • "
+            f"{stats['memory_bytes'] / 1024 / 1024:.1f} / "
+            f"{stats['budget_bytes'] / 1024 / 1024:.0f} MB"
+        )